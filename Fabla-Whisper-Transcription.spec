@@ -18,7 +18,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['benchmark'],  # Only needed for calibration, not by the GUI
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
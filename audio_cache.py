@@ -0,0 +1,104 @@
+"""
+On-disk cache of decoded audio for repeated transcription runs.
+
+Decoding with FFmpeg is paid on every run when the same corpus is
+re-transcribed with different models or settings. This cache stores each
+file's decoded 16 kHz float32 waveform (and optionally its log-mel
+spectrogram) as .npy files named by a hash of the file contents, and loads
+them back as memory maps so no decoding or copying happens on later runs.
+"""
+
+import os
+import hashlib
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import whisper
+
+from inputs import AudioInput
+
+
+def as_audio_input(file_path):
+    """Wrap a filesystem path in an AudioInput; AudioInput objects are returned as is."""
+    if isinstance(file_path, AudioInput):
+        return file_path
+    return AudioInput(os.path.basename(file_path), path=str(file_path))
+
+
+class AudioCache:
+    """
+    Content-addressed cache of decoded audio stored as .npy files.
+
+    Methods accept a filesystem path or an AudioInput (e.g. an archive member).
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Digest per (path, size, mtime[, member]) so each file is hashed once per run
+        self._digests = {}
+
+    def digest(self, file_path):
+        """Return a hex digest of the file contents."""
+        audio_input = as_audio_input(file_path)
+        key = audio_input.cache_key()
+        if key not in self._digests:
+            hasher = hashlib.blake2b(digest_size=16)
+            with audio_input.open() as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(chunk)
+            self._digests[key] = hasher.hexdigest()
+        return self._digests[key]
+
+    def path_for(self, digest, suffix):
+        """Return the cache file path for a digest and entry type."""
+        return self.cache_dir / f"{digest}.{suffix}.npy"
+
+    def _load(self, path):
+        # Copy-on-write map: no copy is made unless the array is modified,
+        # and torch.from_numpy accepts it without a read-only warning
+        return np.load(path, mmap_mode='c')
+
+    def _save(self, path, array):
+        # Write to a temporary file first so a crashed run never leaves a
+        # truncated entry behind
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def cached(self, file_path, suffix, compute):
+        """
+        Return the cached array for file_path and suffix.
+
+        On a cache miss, compute() is called and its result is stored first.
+        """
+        path = self.path_for(self.digest(file_path), suffix)
+        if not path.exists():
+            self._save(path, compute())
+        return self._load(path)
+
+    def load_audio(self, file_path):
+        """
+        Return the decoded 16 kHz mono waveform of file_path.
+
+        Decodes with FFmpeg on a cache miss and stores the result.
+        """
+        return self.cached(file_path, 'pcm16k', lambda: as_audio_input(file_path).load_audio())
+
+    def load_log_mel(self, file_path, n_mels=80):
+        """
+        Return the log-mel spectrogram of file_path as an (n_mels, frames) array.
+
+        Computed from the cached waveform on a cache miss.
+        """
+        return self.cached(
+            file_path,
+            f'mel{n_mels}',
+            lambda: whisper.log_mel_spectrogram(self.load_audio(file_path), n_mels).numpy()
+        )
@@ -0,0 +1,272 @@
+"""
+Calibrate torch threads and worker processes for this machine.
+
+Runs the transcription path on synthetic audio with several thread and
+process combinations, measures throughput and memory use, and saves the
+best settings as a per-host profile. transcribe-whisper.py and
+transcribe-whisper-gui.py load the profile automatically at startup.
+
+Whisper's model.transcribe decodes one file at a time, so there is no batch
+size to tune; files are the unit of work handed to each process.
+
+Usage:
+    python autotune.py                 # calibrate with the base model
+    python autotune.py --model small   # calibrate for another model
+    python autotune.py --show          # print the saved profile
+"""
+
+import os
+import json
+import time
+import socket
+import argparse
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Optional: more accurate available-memory readings
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+PROFILE_FOLDER = Path.home() / ".fabla-whisper"
+
+# Fraction of the available memory the workers may use together
+MEMORY_BUDGET = 0.8
+
+
+def profile_path(hostname=None):
+    """Return the profile file for a host (named by host so shared home folders work)."""
+    return PROFILE_FOLDER / f"host-profile-{hostname or socket.gethostname()}.json"
+
+
+def load_host_profile():
+    """Return this host's saved profile, or None if it has not been calibrated."""
+    path = profile_path()
+    if not path.exists():
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def check_profile_model(profile, model_name, log=print):
+    """Log a note if profile was calibrated with a different model than model_name."""
+    if profile and profile.get('model') != model_name:
+        log(f"Note: the host profile was calibrated with the {profile.get('model')} model, not {model_name}; "
+            f"run 'python autotune.py --model {model_name}' for settings measured with it")
+
+
+def apply_host_profile(for_gui=False, model_name=None, log=print):
+    """
+    Set torch's thread count from this host's profile.
+
+    Args:
+        for_gui: Use the GUI setting, which leaves a core free for the window
+        model_name: Model about to be used; a note is logged if the profile
+                    was calibrated with another one
+        log: Function used for the note
+
+    Returns:
+        The number of threads set, or None if there is no profile
+    """
+    profile = load_host_profile()
+    if not profile:
+        return None
+    if model_name:
+        check_profile_model(profile, model_name, log)
+    threads = profile['gui_threads'] if for_gui else profile['torch_threads']
+    set_torch_threads(threads)
+    return threads
+
+
+def threads_per_worker(workers, profile=None):
+    """Return torch threads for each of workers processes so together they do not oversubscribe the cores."""
+    if profile and profile.get('workers') == workers:
+        return profile['worker_threads']
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def set_torch_threads(threads):
+    """Set the number of threads torch uses for CPU inference in this process."""
+    import torch
+    torch.set_num_threads(threads)
+
+
+def available_memory_mb():
+    """Return the memory currently available to new processes in MB, if known."""
+    if PSUTIL_AVAILABLE:
+        return psutil.virtual_memory().available / (1024 * 1024)
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES') / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def calibration_audio(duration):
+    """Deterministic speech-band audio for the calibration runs."""
+    # Imported here so the GUI (which only loads profiles) does not need benchmark.py
+    from benchmark import synthesize_audio
+    return synthesize_audio('mixed', duration, np.random.default_rng(0))
+
+
+def measure_worker(model_name, threads, duration, repeats):
+    """
+    Load a model in this process and time transcription of the calibration audio.
+
+    Returns:
+        Tuple of (audio seconds transcribed per second, peak memory in MB)
+    """
+    import whisper
+    from benchmark import peak_memory_mb
+    set_torch_threads(threads)
+    model = whisper.load_model(model_name, device="cpu")
+    audio = calibration_audio(duration)
+
+    # The first call pays one-off setup costs
+    model.transcribe(audio, fp16=False, temperature=0.0)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.transcribe(audio, fp16=False, temperature=0.0)
+    elapsed = time.perf_counter() - start
+    return duration * repeats / elapsed, peak_memory_mb()
+
+
+def _measure_worker_star(arguments):
+    return measure_worker(*arguments)
+
+
+def measure_configuration(model_name, workers, threads, duration, repeats):
+    """
+    Run workers processes with threads torch threads each, all at once.
+
+    Returns:
+        Dictionary with the combined throughput and the largest per-process peak memory
+    """
+    # Each configuration runs in fresh processes so thread settings and
+    # memory peaks do not leak between measurements
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers) as pool:
+        measurements = pool.map(_measure_worker_star, [(model_name, threads, duration, repeats)] * workers)
+
+    memory = [peak for _, peak in measurements if peak is not None]
+    return {
+        'workers': workers,
+        'threads': threads,
+        'audio_sec_per_sec': round(sum(rate for rate, _ in measurements), 3),
+        'peak_memory_mb_per_worker': round(max(memory), 1) if memory else None,
+    }
+
+
+def powers_of_two_up_to(limit):
+    values = []
+    value = 1
+    while value <= limit:
+        values.append(value)
+        value *= 2
+    if values[-1] != limit:
+        values.append(limit)
+    return values
+
+
+def calibrate(model_name='base', duration=30, repeats=2, log=print):
+    """
+    Measure thread and worker combinations and return the best settings.
+
+    First the thread count of a single process is swept, then the cores are
+    split between several processes. Worker counts whose combined peak
+    memory would exceed MEMORY_BUDGET of the available memory are skipped.
+
+    Returns:
+        Profile dictionary ready to be saved with save_host_profile
+    """
+    cpu_count = os.cpu_count() or 1
+    memory_mb = available_memory_mb()
+    log(f"Calibrating {model_name} on {cpu_count} CPU(s)"
+        + (f", {memory_mb / 1024:.1f} GB available" if memory_mb else ""))
+
+    # Single process: how many threads before adding more stops helping?
+    measurements = []
+    for threads in powers_of_two_up_to(cpu_count):
+        result = measure_configuration(model_name, 1, threads, duration, repeats)
+        measurements.append(result)
+        log(f"  1 worker x {threads} thread(s): {result['audio_sec_per_sec']:.2f} audio-sec/sec")
+    best_single = max(measurements, key=lambda m: m['audio_sec_per_sec'])
+    worker_memory = best_single['peak_memory_mb_per_worker']
+
+    # Several processes sharing the cores
+    for workers in powers_of_two_up_to(cpu_count)[1:]:
+        if memory_mb and worker_memory and workers * worker_memory > MEMORY_BUDGET * memory_mb:
+            log(f"  {workers} workers skipped: not enough memory")
+            break
+        threads = max(1, cpu_count // workers)
+        result = measure_configuration(model_name, workers, threads, duration, repeats)
+        measurements.append(result)
+        log(f"  {workers} workers x {threads} thread(s): {result['audio_sec_per_sec']:.2f} audio-sec/sec")
+
+    best = max(measurements, key=lambda m: m['audio_sec_per_sec'])
+    return {
+        'hostname': socket.gethostname(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'model': model_name,
+        'cpu_count': cpu_count,
+        'available_memory_mb': round(memory_mb) if memory_mb else None,
+        # Single-process runs (the default CLI mode)
+        'torch_threads': best_single['threads'],
+        # Keep one core free so the GUI stays responsive
+        'gui_threads': max(1, min(best_single['threads'], cpu_count - 1)),
+        # Best split for --local-workers
+        'workers': best['workers'],
+        'worker_threads': best['threads'],
+        'measurements': measurements,
+    }
+
+
+def save_host_profile(profile):
+    """Write a profile to this host's profile file and return its path."""
+    path = profile_path(profile['hostname'])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def parse_arguments():
+    """Parse calibration settings."""
+    parser = argparse.ArgumentParser(description="Calibrate Fabla Whisper settings for this machine.")
+    parser.add_argument('--model', default='base', help="Whisper model to calibrate with (default: base)")
+    parser.add_argument('--duration', type=int, default=30,
+                        help="Length of the synthetic calibration audio in seconds (default: 30)")
+    parser.add_argument('--repeats', type=int, default=2, help="Timed runs per measurement (default: 2)")
+    parser.add_argument('--show', action='store_true', help="Print the saved profile and exit")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    if args.show:
+        profile = load_host_profile()
+        print(json.dumps(profile, indent=2) if profile else f"No profile saved at {profile_path()}")
+        return
+
+    profile = calibrate(args.model, args.duration, args.repeats)
+    path = save_host_profile(profile)
+
+    print("\n" + "="*60)
+    print("Calibration complete!")
+    print(f"Torch threads (single process): {profile['torch_threads']}")
+    print(f"Torch threads (GUI): {profile['gui_threads']}")
+    print(f"Best split: {profile['workers']} worker(s) x {profile['worker_threads']} thread(s)")
+    print(f"Profile saved to: {path}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
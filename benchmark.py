@@ -0,0 +1,396 @@
+"""
+Benchmark the command-line transcription pipeline on synthetic audio.
+
+Generates deterministic audio fixtures offline, runs transcribe_audio_files
+from transcribe-whisper.py end to end and records throughput, startup time
+and peak memory to a JSON file. When a baseline is given, the run fails if
+any metric regressed by more than the allowed threshold.
+
+Usage:
+    python benchmark.py                                  # stubbed model, prints results
+    python benchmark.py --model tiny --output bench.json # real Whisper model
+    python benchmark.py --save-baseline baseline.json    # store a baseline
+    python benchmark.py --baseline baseline.json --threshold 0.15
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+import contextlib
+import io
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+SAMPLE_RATE = 16000
+
+# (kind, duration in seconds) for each generated fixture
+FIXTURE_PLAN = [
+    ('tone', 2), ('silence', 2), ('noise', 2),
+    ('tone', 10), ('silence', 10), ('noise', 10), ('mixed', 10),
+    ('mixed', 30), ('tone', 30), ('mixed', 60),
+]
+
+# Metrics where a larger value is better; all others are "lower is better"
+HIGHER_IS_BETTER = {'files_per_sec', 'audio_sec_per_sec'}
+
+# Changes smaller than these are treated as noise, whatever the threshold
+ABSOLUTE_NOISE_FLOOR = {'startup_sec': 0.05}
+
+# Startup is timed in this many fresh interpreters; the median is reported
+STARTUP_SAMPLES = 5
+
+# Each timed run repeats the pipeline until it has taken at least this long,
+# so millisecond stub runs give stable throughput figures
+MIN_SAMPLE_SEC = 1.0
+
+# Times importing the CLI in a fresh interpreter, where no module is cached yet
+IMPORT_TIMER = (
+    "import time, benchmark; start = time.perf_counter(); "
+    "benchmark.load_cli_module(); print(time.perf_counter() - start)"
+)
+
+CLI_SCRIPT = Path(__file__).parent / "transcribe-whisper.py"
+
+
+def synthesize_audio(kind, duration, rng):
+    """
+    Create a mono float waveform in [-1, 1] of the given kind.
+
+    Args:
+        kind: One of 'tone', 'silence', 'noise' or 'mixed'
+        duration: Length in seconds
+        rng: numpy Generator used for the noise, so fixtures are reproducible
+
+    Returns:
+        float32 numpy array sampled at SAMPLE_RATE
+    """
+    n_samples = int(duration * SAMPLE_RATE)
+    t = np.arange(n_samples, dtype=np.float32) / SAMPLE_RATE
+
+    if kind == 'tone':
+        # Speech-band harmonics with a slow amplitude envelope
+        audio = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.15 * np.sin(2 * np.pi * 660 * t)
+        audio *= 0.5 + 0.5 * np.sin(2 * np.pi * 0.5 * t)
+    elif kind == 'silence':
+        audio = np.zeros(n_samples, dtype=np.float32)
+    elif kind == 'noise':
+        audio = 0.1 * rng.standard_normal(n_samples)
+    elif kind == 'mixed':
+        # Alternate tone, silence and noise in one-second blocks
+        tone = synthesize_audio('tone', duration, rng)
+        noise = synthesize_audio('noise', duration, rng)
+        block = (t.astype(np.int64)) % 3
+        audio = np.where(block == 0, tone, np.where(block == 2, noise, 0.0))
+    else:
+        raise ValueError(f"Unknown fixture kind: {kind}")
+
+    return np.clip(audio, -1.0, 1.0).astype(np.float32)
+
+
+def write_wav(path, audio):
+    """Write a float waveform as 16-bit mono PCM WAV."""
+    pcm = (audio * 32767).astype('<i2')
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm.tobytes())
+
+
+def generate_fixtures(folder, seed=0, plan=FIXTURE_PLAN):
+    """
+    Generate deterministic Fabla-style audio fixtures in folder.
+
+    Files are named PARTICIPANT_ID_DATE_TIME.wav so that the filename
+    parsing in the pipeline is exercised as well.
+
+    Returns:
+        Total duration of the generated audio in seconds
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    total_duration = 0
+    for idx, (kind, duration) in enumerate(plan):
+        participant_id = f"P{idx % 3 + 1:03d}"
+        date = f"2024-01-{idx // 3 + 1:02d}"
+        time_of_day = f"{9 + idx % 12:02d}-00-00"
+        write_wav(folder / f"{participant_id}_{date}_{time_of_day}.wav", synthesize_audio(kind, duration, rng))
+        total_duration += duration
+
+    return total_duration
+
+
+def read_wav(path, sr=SAMPLE_RATE):
+    """
+    Read a 16-bit mono WAV written by write_wav as float32 samples.
+
+    Has the same signature as whisper.load_audio so it can stand in for it;
+    the fixtures are already at SAMPLE_RATE, so sr is not used for resampling.
+    """
+    with wave.open(str(path), 'rb') as wav_file:
+        frames = wav_file.readframes(wav_file.getnframes())
+    return np.frombuffer(frames, np.int16).astype(np.float32) / 32768.0
+
+
+class StubModel:
+    """
+    Stand-in for a Whisper model that returns a result in the same shape
+    as model.transcribe without running inference.
+
+    It still reads the audio so that per-file I/O is part of the measurement.
+    """
+
+    segment_length = 5.0
+
+    def transcribe(self, audio, word_timestamps=False, **kwargs):
+        if isinstance(audio, (str, os.PathLike)):
+            audio = read_wav(audio)
+        duration = len(audio) / SAMPLE_RATE
+
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + self.segment_length, duration)
+            text = f" Benchmark segment {len(segments) + 1}."
+            segment = {
+                'id': len(segments),
+                'seek': int(start * 100),
+                'start': start,
+                'end': end,
+                'text': text,
+                'tokens': [],
+                'temperature': 0.0,
+                'avg_logprob': -0.3,
+                'compression_ratio': 1.2,
+                'no_speech_prob': float(np.abs(audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]).mean() < 1e-3),
+            }
+            if word_timestamps:
+                words = text.split()
+                step = (end - start) / len(words)
+                segment['words'] = [
+                    {'word': f" {word}", 'start': start + i * step, 'end': start + (i + 1) * step, 'probability': 0.9}
+                    for i, word in enumerate(words)
+                ]
+            segments.append(segment)
+            start = end
+
+        return {
+            'text': "".join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': 'en'
+        }
+
+
+def load_cli_module():
+    """Import transcribe-whisper.py (its filename is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location("transcribe_whisper", CLI_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_memory_mb():
+    """Return the peak resident set size of this process in MB, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def measure_import_sec(samples=STARTUP_SAMPLES):
+    """Return the median time to import transcribe-whisper.py in a fresh interpreter."""
+    times = []
+    for _ in range(samples):
+        completed = subprocess.run(
+            [sys.executable, "-c", IMPORT_TIMER],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+        )
+        times.append(float(completed.stdout.strip().splitlines()[-1]))
+    return float(np.median(times))
+
+
+def run_benchmark(fixtures_folder, total_audio_sec, model_name='stub', repeat=3, output_formats=(),
+                  cache_dir=None, min_sample_sec=MIN_SAMPLE_SEC):
+    """
+    Run the CLI pipeline over the fixtures and collect metrics.
+
+    Args:
+        fixtures_folder: Folder containing the generated audio
+        total_audio_sec: Duration of the fixtures in seconds
+        model_name: 'stub' for StubModel, otherwise a Whisper model name
+        repeat: Number of timed runs; the median is reported
+        output_formats: Sidecar formats to write, passed to the pipeline
+        cache_dir: Decoded-audio cache folder, passed to the pipeline
+        min_sample_sec: Each timed run passes over the fixtures until it
+                        has taken at least this long and reports the mean
+
+    Returns:
+        Dictionary of metrics
+    """
+    import_sec = measure_import_sec()
+    cli = load_cli_module()
+
+    # Time model loading separately from transcription
+    load_times = []
+    real_load_model = cli.whisper.load_model
+
+    def timed_load_model(name, *args, **kwargs):
+        load_start = time.perf_counter()
+        model = StubModel() if model_name == 'stub' else real_load_model(model_name, *args, **kwargs)
+        load_times.append(time.perf_counter() - load_start)
+        return model
+
+    cli.whisper.load_model = timed_load_model
+    # The stub reads the WAV fixtures directly so FFmpeg is not needed
+    real_load_audio = cli.whisper.load_audio
+    if model_name == 'stub':
+        cli.whisper.load_audio = read_wav
+    filename_config = {'delimiter': '_', 'id_position': 0, 'date_position': 1, 'time_position': 2}
+
+    run_times = []
+    n_files = 0
+    try:
+        for _ in range(repeat):
+            elapsed = 0.0
+            passes = 0
+            while passes == 0 or elapsed < min_sample_sec:
+                with tempfile.TemporaryDirectory() as output_folder:
+                    run_start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        results = cli.transcribe_audio_files(
+                            str(fixtures_folder),
+                            Path(output_folder),
+                            filename_config,
+                            output_formats=output_formats,
+                            model_name=model_name,
+                            cache_dir=cache_dir
+                        )
+                    elapsed += time.perf_counter() - run_start - load_times[-1]
+                    passes += 1
+                    n_files = len(results)
+            run_times.append(elapsed / passes)
+    finally:
+        cli.whisper.load_model = real_load_model
+        cli.whisper.load_audio = real_load_audio
+
+    transcribe_sec = float(np.median(run_times))
+    return {
+        'files': n_files,
+        'audio_sec': total_audio_sec,
+        'files_per_sec': n_files / transcribe_sec,
+        'audio_sec_per_sec': total_audio_sec / transcribe_sec,
+        'startup_sec': import_sec + float(np.median(load_times)),
+        'peak_memory_mb': peak_memory_mb(),
+    }
+
+
+def compare_to_baseline(metrics, baseline, threshold):
+    """
+    Compare metrics against a baseline.
+
+    Returns:
+        List of human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for name, base_value in baseline.items():
+        value = metrics.get(name)
+        if name in ('files', 'audio_sec') or value is None or not base_value:
+            continue
+        if name in HIGHER_IS_BETTER:
+            change = (base_value - value) / base_value
+        else:
+            change = (value - base_value) / base_value
+        if abs(value - base_value) < ABSOLUTE_NOISE_FLOOR.get(name, 0):
+            continue
+        if change > threshold:
+            regressions.append(f"{name}: {value:.3f} vs baseline {base_value:.3f} ({change:.1%} worse)")
+    return regressions
+
+
+def parse_arguments():
+    """Parse benchmark settings."""
+    parser = argparse.ArgumentParser(description="Benchmark the Fabla Whisper transcription pipeline.")
+    parser.add_argument('--model', default='stub',
+                        help="Whisper model name, or 'stub' to skip inference (default: stub)")
+    parser.add_argument('--repeat', type=int, default=3, help="Number of timed runs (default: 3)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the synthetic fixtures (default: 0)")
+    parser.add_argument('--fixtures-dir', help="Keep generated fixtures in this folder instead of a temp folder")
+    parser.add_argument('--output-formats', nargs='+', default=[],
+                        help="Sidecar formats to write during the run (e.g. srt json)")
+    parser.add_argument('--audio-cache', metavar='DIR',
+                        help="Use a decoded-audio cache folder (runs after the first one hit the cache)")
+    parser.add_argument('--output', help="Write results to this JSON file")
+    parser.add_argument('--baseline', help="Fail if results regress compared to this JSON file")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Allowed regression as a fraction of the baseline (default: 0.10)")
+    parser.add_argument('--save-baseline', help="Write results to this JSON file as the new baseline")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    fixtures_folder = Path(args.fixtures_dir) if args.fixtures_dir else Path(tempfile.mkdtemp(prefix="fabla-bench-"))
+    try:
+        total_audio_sec = generate_fixtures(fixtures_folder, seed=args.seed)
+        metrics = run_benchmark(
+            fixtures_folder,
+            total_audio_sec,
+            model_name=args.model,
+            repeat=args.repeat,
+            output_formats=args.output_formats,
+            cache_dir=args.audio_cache
+        )
+    finally:
+        if not args.fixtures_dir:
+            shutil.rmtree(fixtures_folder, ignore_errors=True)
+
+    report = {
+        'model': args.model,
+        'seed': args.seed,
+        'audio_cache': bool(args.audio_cache),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'metrics': metrics,
+    }
+
+    print(json.dumps(report, indent=2))
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(metrics, baseline['metrics'], args.threshold)
+        if regressions:
+            print("\nPerformance regressions detected:")
+            for message in regressions:
+                print(f"  ✗ {message}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} of baseline.")
+
+
+if __name__ == "__main__":
+    main()
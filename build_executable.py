@@ -77,6 +77,7 @@ def build_executable():
             "--hidden-import=numpy",  # Ensure numpy is included
             "--hidden-import=torch",  # Ensure torch is included
             "--hidden-import=torchaudio",  # Ensure torchaudio is included
+            "--exclude-module=benchmark",  # Only needed for calibration, not by the GUI
             "transcribe-whisper-gui.py"
         ]
         
@@ -0,0 +1,190 @@
+"""
+Lightweight two-speaker labelling for participant-interviewer recordings.
+
+Speaker embeddings are simple spectral statistics (mean and standard
+deviation of each log-mel band) computed on a fixed grid of one-second
+windows of the decoded audio. Because the grid does not depend on the
+Whisper segments, the window embeddings can be cached per file and reused
+across models. Each Whisper segment is then embedded by averaging the
+windows it covers, and the segments are split into speakers with a
+duration-weighted two-cluster k-means. This runs on the CPU in a fraction
+of the transcription time; it is not a replacement for a full diarization
+model on overlapping or many-speaker audio.
+"""
+
+import numpy as np
+import whisper
+
+# Log-mel frames per second (whisper.audio.HOP_LENGTH is 160 samples at 16 kHz)
+FRAMES_PER_SECOND = 100
+WINDOW_FRAMES = 100
+HOP_FRAMES = 50
+
+# Cache entry name for window embeddings; includes the window settings so
+# that changing them does not reuse embeddings computed with other ones
+EMBEDDING_CACHE_KEY = f"spkemb-w{WINDOW_FRAMES}-h{HOP_FRAMES}"
+
+
+def window_embeddings(audio, mel=None):
+    """
+    Compute speaker embeddings for one-second windows of a waveform.
+
+    Args:
+        audio: Decoded 16 kHz mono waveform
+        mel: Optional 80-band log-mel spectrogram of audio, e.g. from
+             AudioCache.load_log_mel, so it is not computed again
+
+    Returns:
+        float32 array of shape (n_windows, 2 * n_mels) holding the mean and
+        standard deviation of each mel band in each window
+    """
+    if mel is None:
+        mel = whisper.log_mel_spectrogram(audio).numpy()
+    mel = np.asarray(mel, dtype=np.float64)
+    n_frames = mel.shape[1]
+    if n_frames == 0:
+        return np.zeros((0, 2 * mel.shape[0]), dtype=np.float32)
+    window = min(WINDOW_FRAMES, n_frames)
+    starts = np.arange(0, n_frames - window + 1, HOP_FRAMES)
+
+    # Window sums from cumulative sums, so every window is computed at once
+    zeros = np.zeros((mel.shape[0], 1))
+    csum = np.concatenate([zeros, np.cumsum(mel, axis=1)], axis=1)
+    csum_sq = np.concatenate([zeros, np.cumsum(mel ** 2, axis=1)], axis=1)
+    mean = (csum[:, starts + window] - csum[:, starts]) / window
+    mean_sq = (csum_sq[:, starts + window] - csum_sq[:, starts]) / window
+    std = np.sqrt(np.maximum(mean_sq - mean ** 2, 0.0))
+
+    return np.concatenate([mean, std], axis=0).T.astype(np.float32)
+
+
+def segment_embeddings(windows, segments):
+    """
+    Average the window embeddings covered by each segment.
+
+    Segments too short to contain a window center use the nearest window.
+
+    Returns:
+        Array of shape (n_segments, embedding size)
+    """
+    centers = (np.arange(len(windows)) * HOP_FRAMES + WINDOW_FRAMES / 2) / FRAMES_PER_SECOND
+    starts = np.array([segment['start'] for segment in segments])[:, None]
+    ends = np.array([segment['end'] for segment in segments])[:, None]
+
+    covered = (centers >= starts) & (centers < ends)
+    nearest = np.abs(centers - (starts + ends) / 2).argmin(axis=1)
+    empty = ~covered.any(axis=1)
+    covered[empty, nearest[empty]] = True
+
+    weights = covered / covered.sum(axis=1, keepdims=True)
+    return weights @ windows
+
+
+def cluster_speakers(embeddings, durations, min_separation=1.0, n_iterations=20):
+    """
+    Split segments into at most two speakers.
+
+    Embeddings are standardized, then clustered with a duration-weighted
+    k-means started from the two most distant segments. If the two clusters
+    are closer together than min_separation times their average spread, all
+    segments are assigned to a single speaker.
+
+    Returns:
+        Integer array of cluster indices (0 or 1) per segment
+    """
+    n_segments = len(embeddings)
+    if n_segments < 2:
+        return np.zeros(n_segments, dtype=int)
+
+    x = (embeddings - embeddings.mean(axis=0)) / (embeddings.std(axis=0) + 1e-6)
+    weights = np.asarray(durations, dtype=np.float64) + 1e-3
+
+    # Deterministic start: the segment farthest from the mean, then the one farthest from it
+    first = np.linalg.norm(x, axis=1).argmax()
+    second = np.linalg.norm(x - x[first], axis=1).argmax()
+    centers = x[[first, second]]
+
+    labels = None
+    for _ in range(n_iterations):
+        distances = np.linalg.norm(x[:, None, :] - centers[None, :, :], axis=2)
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        if np.bincount(new_labels, minlength=2).min() == 0:
+            break
+        labels = new_labels
+        centers = np.stack([
+            np.average(x[labels == k], axis=0, weights=weights[labels == k])
+            for k in range(2)
+        ])
+
+    if labels is None:
+        return np.zeros(n_segments, dtype=int)
+
+    spread = np.mean([
+        np.average(np.linalg.norm(x[labels == k] - centers[k], axis=1), weights=weights[labels == k])
+        for k in range(2)
+    ])
+    if np.linalg.norm(centers[0] - centers[1]) < min_separation * spread:
+        return np.zeros(n_segments, dtype=int)
+    return labels
+
+
+def label_segments(result, windows, min_separation=1.0):
+    """
+    Add a 'speaker' label to every segment of a Whisper result.
+
+    Speakers are named SPEAKER_1 and SPEAKER_2 in order of first appearance.
+
+    Returns:
+        Number of speakers found
+    """
+    segments = result['segments']
+    if not segments:
+        return 0
+
+    if len(windows) == 0:
+        labels = np.zeros(len(segments), dtype=int)
+    else:
+        embeddings = segment_embeddings(np.asarray(windows), segments)
+        durations = [segment['end'] - segment['start'] for segment in segments]
+        labels = cluster_speakers(embeddings, durations, min_separation)
+
+    names = {}
+    for segment, label in zip(segments, labels):
+        names.setdefault(label, f"SPEAKER_{len(names) + 1}")
+        segment['speaker'] = names[label]
+    return len(names)
+
+
+def speaker_transcript(segments):
+    """Join segment texts into '[SPEAKER_1] ... [SPEAKER_2] ...' turns."""
+    turns = []
+    for segment in segments:
+        text = segment['text'].strip()
+        if turns and turns[-1][0] == segment['speaker']:
+            turns[-1][1].append(text)
+        else:
+            turns.append((segment['speaker'], [text]))
+    return " ".join(f"[{speaker}] {' '.join(texts)}" for speaker, texts in turns)
+
+
+def with_speaker_prefixes(result):
+    """
+    Return a copy of result whose segment texts start with their speaker label.
+
+    Used for subtitle formats, which have no field for the speaker. When word
+    timestamps are present the label is added to the first word, because the
+    subtitle writers build cues from the words in that case.
+    """
+    segments = []
+    for segment in result['segments']:
+        segment = dict(segment)
+        prefix = f"[{segment['speaker']}]"
+        segment['text'] = f"{prefix}{segment['text']}"
+        if segment.get('words'):
+            first_word = dict(segment['words'][0])
+            first_word['word'] = f" {prefix}{first_word['word']}"
+            segment['words'] = [first_word] + segment['words'][1:]
+        segments.append(segment)
+    return {**result, 'segments': segments}
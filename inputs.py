@@ -0,0 +1,324 @@
+"""
+Discovery and decoding of audio inputs.
+
+An input can be a folder of audio files, a zip or tar archive of audio
+files, or a CSV/JSONL manifest listing audio file paths. Archive members
+are never extracted to disk: their bytes are streamed into FFmpeg through
+a pipe and decoded to the same 16 kHz waveform whisper.load_audio returns.
+"""
+
+import io
+import os
+import csv
+import json
+import struct
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import threading
+import subprocess
+
+import numpy as np
+import whisper
+
+# Supported audio file extensions
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.aac', '.m4a', '.flac', '.ogg', '.wma'}
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+MANIFEST_SUFFIXES = ('.csv', '.jsonl')
+
+# MP4-family containers usually keep their index at the end of the file,
+# which FFmpeg cannot reach when reading from a pipe
+SEEKABLE_ONLY_EXTENSIONS = {'.m4a', '.mp4', '.aac'}
+
+# Open tar archives, reused so that reading members in archive order only
+# moves forward through a compressed stream instead of restarting it
+_open_tar_archives = {}
+
+# Bytes of the most recently read archive member. The cache digest, FFmpeg
+# and the temporary-file fallback all read the same member one after the
+# other; reading it again from a compressed tar would seek backwards and
+# restart decompression from the start of the archive
+_member_bytes = {}
+
+
+def is_archive(path):
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def is_manifest(path):
+    return os.path.isfile(path) and path.lower().endswith(MANIFEST_SUFFIXES)
+
+
+def is_bulk_input(path):
+    """Return True if path is an archive or manifest that can be used instead of a folder."""
+    return is_archive(path) or is_manifest(path)
+
+
+def input_display_name(path):
+    """Return the folder, archive or manifest name without its extension."""
+    name = os.path.basename(str(path).rstrip('/\\'))
+    if os.path.isdir(path):
+        return name
+    for suffix in ARCHIVE_SUFFIXES + MANIFEST_SUFFIXES:
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+class AudioInput:
+    """
+    One audio recording, either a file on disk or a member of an archive.
+
+    Attributes:
+        name: Unique name of the input (the filename, archive member name
+              or manifest entry); used for the Filename column
+        path: Filesystem path, or None for archive members
+        archive: Archive path for archive members
+        member: Member name inside the archive
+    """
+
+    def __init__(self, name, path=None, archive=None, member=None):
+        self.name = name
+        self.path = path
+        self.archive = archive
+        self.member = member
+
+    def __repr__(self):
+        return f"AudioInput({self.name!r})"
+
+    @property
+    def basename(self):
+        """Filename without any folders, for extracting Participant ID/Date/Time."""
+        return os.path.basename(self.name.replace('\\', '/'))
+
+    @property
+    def folder(self):
+        """Folders of name as a safe relative path ('' for names without folders)."""
+        parts = [
+            part for part in self.name.replace('\\', '/').split('/')[:-1]
+            if part not in ('', '.', '..') and not part.endswith(':')
+        ]
+        return os.path.join(*parts) if parts else ''
+
+    @property
+    def extension(self):
+        return os.path.splitext(self.basename.lower())[1]
+
+    def cache_key(self):
+        """Key that changes whenever the underlying bytes may have changed."""
+        if self.path:
+            stat = os.stat(self.path)
+            return (os.path.abspath(self.path), stat.st_size, stat.st_mtime_ns)
+        stat = os.stat(self.archive)
+        return (os.path.abspath(self.archive), stat.st_size, stat.st_mtime_ns, self.member)
+
+    def open(self):
+        """Open the recording's bytes as a binary file object."""
+        if self.path:
+            return open(self.path, 'rb')
+        return io.BytesIO(self.read_member())
+
+    def read_member(self):
+        """Return the bytes of an archive member, reading the archive only once per member."""
+        key = (self.archive, self.member)
+        if key not in _member_bytes:
+            _member_bytes.clear()
+            if self.archive.lower().endswith('.zip'):
+                with zipfile.ZipFile(self.archive) as archive_file:
+                    _member_bytes[key] = archive_file.read(self.member)
+            else:
+                archive_file = _open_tar_archives.get(self.archive)
+                if archive_file is None:
+                    archive_file = _open_tar_archives[self.archive] = tarfile.open(self.archive)
+                with archive_file.extractfile(self.member) as member_file:
+                    _member_bytes[key] = member_file.read()
+        return _member_bytes[key]
+
+    def load_audio(self, sr=whisper.audio.SAMPLE_RATE):
+        """Decode the recording to a mono float32 waveform at sr."""
+        if self.path:
+            return whisper.load_audio(self.path, sr)
+        if not (self.extension in SEEKABLE_ONLY_EXTENSIONS and index_after_media(self.read_member())):
+            try:
+                return decode_stream(self.open, sr)
+            except RuntimeError:
+                if self.extension not in SEEKABLE_ONLY_EXTENSIONS:
+                    raise
+        # FFmpeg needs a seekable file for this container; spool just this
+        # member to a temporary file that is removed right after decoding
+        with tempfile.NamedTemporaryFile(suffix=self.extension, delete=False) as tmp:
+            tmp.write(self.read_member())
+        try:
+            return whisper.load_audio(tmp.name, sr)
+        finally:
+            os.unlink(tmp.name)
+
+
+def close_archives():
+    """Close the tar archives kept open while reading members and drop the cached member."""
+    for archive_file in _open_tar_archives.values():
+        archive_file.close()
+    _open_tar_archives.clear()
+    _member_bytes.clear()
+
+
+def index_after_media(data):
+    """
+    Return True if an MP4-family file stores its index ('moov') after its media data ('mdat').
+
+    Such files cannot be decoded from a pipe. Only the top-level atom headers
+    are read; data that does not parse as MP4 (e.g. raw ADTS .aac) returns False.
+    """
+    offset = 0
+    while offset + 8 <= len(data):
+        size, atom = struct.unpack('>I4s', data[offset:offset + 8])
+        if atom == b'moov':
+            return False
+        if atom == b'mdat':
+            return True
+        if size == 1:
+            if offset + 16 > len(data):
+                return False
+            size = struct.unpack('>Q', data[offset + 8:offset + 16])[0]
+        if size < 8:
+            # size 0 means the atom runs to the end of the file
+            return False
+        offset += size
+    return False
+
+
+def decode_stream(open_stream, sr=whisper.audio.SAMPLE_RATE):
+    """
+    Decode audio bytes by piping them into FFmpeg.
+
+    Args:
+        open_stream: Callable returning a binary file object with the audio
+        sr: Sample rate to resample to
+
+    Returns:
+        Mono float32 waveform, as returned by whisper.load_audio
+    """
+    # fmt: off
+    cmd = [
+        "ffmpeg",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sr),
+        "-"
+    ]
+    # fmt: on
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def feed():
+        try:
+            with open_stream() as stream:
+                shutil.copyfileobj(stream, process.stdin, 1024 * 1024)
+        except (BrokenPipeError, OSError):
+            # FFmpeg stopped reading (e.g. it failed on the input); its exit
+            # code and stderr report the actual problem
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    # Write stdin and read stderr on threads so none of the pipes can fill up and block
+    stderr_chunks = []
+    feeder = threading.Thread(target=feed, daemon=True)
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    feeder.start()
+    stderr_reader.start()
+    out = process.stdout.read()
+    process.wait()
+    feeder.join()
+    stderr_reader.join()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to load audio: {b''.join(stderr_chunks).decode(errors='replace')}")
+
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def _read_manifest(manifest_path):
+    """Return the audio paths listed in a CSV or JSONL manifest."""
+    paths = []
+    if manifest_path.lower().endswith('.jsonl'):
+        with open(manifest_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                paths.append(entry['path'] if isinstance(entry, dict) else entry)
+    else:
+        with open(manifest_path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            # Use the 'path' column if there is one, otherwise the first column
+            lowered = [column.strip().lower() for column in header]
+            if 'path' in lowered:
+                column = lowered.index('path')
+            else:
+                column = 0
+                if header:
+                    paths.append(header[0])
+            paths.extend(row[column] for row in reader if len(row) > column and row[column])
+    return paths
+
+
+def discover_audio_inputs(source, extensions=AUDIO_EXTENSIONS):
+    """
+    List the audio inputs in a folder, archive or manifest.
+
+    Args:
+        source: Path to a folder, a zip/tar archive or a CSV/JSONL manifest
+        extensions: Set of lowercase file extensions to include
+
+    Returns:
+        List of AudioInput objects
+    """
+    source = str(source)
+
+    def wanted(name):
+        return os.path.splitext(name.lower())[1] in extensions
+
+    if os.path.isdir(source):
+        return [
+            AudioInput(f, path=os.path.join(source, f))
+            for f in os.listdir(source)
+            if wanted(f)
+        ]
+
+    if source.lower().endswith('.zip'):
+        with zipfile.ZipFile(source) as archive_file:
+            return [
+                AudioInput(info.filename, archive=source, member=info.filename)
+                for info in archive_file.infolist()
+                if not info.is_dir() and wanted(info.filename)
+            ]
+
+    if source.lower().endswith(ARCHIVE_SUFFIXES):
+        with tarfile.open(source) as archive_file:
+            return [
+                AudioInput(member.name, archive=source, member=member.name)
+                for member in archive_file.getmembers()
+                if member.isfile() and wanted(member.name)
+            ]
+
+    if source.lower().endswith(MANIFEST_SUFFIXES):
+        # Relative paths in a manifest are relative to the manifest itself
+        base_folder = os.path.dirname(os.path.abspath(source))
+        return [
+            AudioInput(path, path=os.path.join(base_folder, os.path.expanduser(path)))
+            for path in _read_manifest(source)
+            if wanted(path)
+        ]
+
+    raise ValueError(f"Unsupported input (expected a folder, zip/tar archive or CSV/JSONL manifest): {source}")
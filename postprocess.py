@@ -0,0 +1,192 @@
+"""
+Text normalization and PII redaction applied to each transcription result.
+
+A TextPostProcessor runs a list of normalizers and a list of redactors over
+all the texts of one Whisper result (the full text and every segment) in a
+single batch: the texts are joined with a separator that none of the
+patterns can match, each compiled pattern is applied once to the joined
+string, and the result is split again. Any callable that takes and returns
+a list of strings can be used as a step.
+"""
+
+import re
+import unicodedata
+
+# Joins a batch of texts; not whitespace and not matched by any pattern below
+BATCH_SEPARATOR = "\x00"
+
+_WHITESPACE = re.compile(r"[^\S\x00]+")
+_SPACE_AROUND_SEPARATOR = re.compile(r" ?\x00 ?")
+_QUOTES = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"'})
+
+# Words that often come right before "at" in speech but are not the start of
+# an address ("look at google dot com", "we met at school dot edu"); a spoken
+# address must not start with one of them. Any other word before "at ... dot
+# com" is still redacted: missing a real address is worse than removing a word
+NOT_LOCAL_PART = (
+    "a", "am", "an", "and", "are", "arrive", "arrived", "be", "been", "check", "checked",
+    "details", "find", "found", "go", "going", "good", "her", "here", "him", "home", "i",
+    "info", "information", "is", "it", "live", "lived", "lives", "look", "looked", "looking",
+    "looks", "me", "meet", "met", "more", "online", "page", "sign", "signed", "site", "start",
+    "started", "stay", "stayed", "study", "studied", "that", "the", "them", "there", "this",
+    "us", "visit", "was", "website", "were", "work", "worked", "works", "you",
+)
+
+EMAIL_PATTERN = re.compile(
+    r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+    # Spoken form, as Whisper usually writes it: "jane dot doe at gmail dot com"
+    r"|(?<!')\b(?!(?:" + "|".join(NOT_LOCAL_PART) + r")\b)"
+    r"\w+(?:\s+dot\s+\w+)*\s+at\s+\w+(?:\s+dot\s+\w+)*\s+dot\s+(?:com|org|net|edu|gov)\b",
+    re.IGNORECASE
+)
+PHONE_PATTERN = re.compile(
+    r"(?<![\w+])(?:\+?\d{1,3}[\s.-]?)?(?:\(\d{3}\)|\d{3})[\s.-]?\d{3}[\s.-]?\d{4}(?!\w)"
+)
+
+
+def _batched(function):
+    """Turn a function on one joined string into a step on a list of strings."""
+    def step(texts):
+        return function(BATCH_SEPARATOR.join(texts)).split(BATCH_SEPARATOR)
+    step.__name__ = function.__name__
+    return step
+
+
+@_batched
+def normalize_unicode(text):
+    """Apply NFKC normalization and replace curly quotes with straight ones."""
+    return unicodedata.normalize('NFKC', text).translate(_QUOTES)
+
+
+@_batched
+def normalize_whitespace(text):
+    """Collapse runs of whitespace and trim each text."""
+    text = _WHITESPACE.sub(" ", text)
+    return _SPACE_AROUND_SEPARATOR.sub(BATCH_SEPARATOR, text).strip(" ")
+
+
+@_batched
+def redact_emails(text):
+    return EMAIL_PATTERN.sub("[EMAIL]", text)
+
+
+@_batched
+def redact_phone_numbers(text):
+    return PHONE_PATTERN.sub("[PHONE]", text)
+
+
+def name_redactor(names):
+    """
+    Build a step that replaces the given names (whole words, any case) with [NAME].
+
+    Args:
+        names: Iterable of names; longer names are matched first so that
+               "Mary Ann" is redacted as one name rather than "Mary"
+    """
+    names = sorted({name.strip() for name in names if name.strip()}, key=len, reverse=True)
+    if not names:
+        return lambda texts: texts
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(name) for name in names) + r")\b", re.IGNORECASE)
+
+    @_batched
+    def redact_names(text):
+        return pattern.sub("[NAME]", text)
+    return redact_names
+
+
+def load_names(names_file):
+    """Read one name per line from a text file, ignoring blank lines and # comments."""
+    with open(names_file, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+NORMALIZERS = {
+    'unicode': normalize_unicode,
+    'whitespace': normalize_whitespace,
+}
+
+REDACTORS = {
+    'email': redact_emails,
+    'phone': redact_phone_numbers,
+}
+
+
+class TextPostProcessor:
+    """Normalizes and redacts the texts of Whisper results."""
+
+    def __init__(self, normalizers=(), redactors=()):
+        self.normalizers = list(normalizers)
+        self.redactors = list(redactors)
+
+    @classmethod
+    def from_options(cls, normalize=False, redact=(), names_file=None):
+        """
+        Build a post-processor from command-line style options.
+
+        Args:
+            normalize: Apply all built-in normalizers
+            redact: Names of built-in redactors from REDACTORS
+            names_file: Optional file of names to redact
+        """
+        redactors = [REDACTORS[name] for name in redact]
+        if names_file:
+            redactors.append(name_redactor(load_names(names_file)))
+        normalizers = NORMALIZERS.values() if normalize else ()
+        return cls(normalizers, redactors)
+
+    @property
+    def redacts(self):
+        return bool(self.redactors)
+
+    def _run(self, steps, texts):
+        for step in steps:
+            texts = step(texts)
+        return texts
+
+    def normalize(self, texts):
+        return self._run(self.normalizers, list(texts))
+
+    def redact(self, texts):
+        return self._run(self.redactors, list(texts))
+
+    def process_result(self, result, drop_raw=False):
+        """
+        Normalize a Whisper result in place and return its redacted version.
+
+        Segment token ids are cleared in the redacted version because they
+        decode to the original text. Segments whose text changed get a single
+        word timing spanning the segment, since per-word redaction cannot
+        reliably cover PII that spans several words.
+
+        Args:
+            result: Dictionary returned by model.transcribe
+            drop_raw: Redact result itself instead of a copy, so that no
+                      unredacted text remains in memory for later outputs
+
+        Returns:
+            The redacted result (result itself if drop_raw or if there are no
+            redactors)
+        """
+        segments = result['segments']
+        texts = self.normalize([result['text']] + [segment['text'] for segment in segments])
+        result['text'] = texts[0]
+        for segment, text in zip(segments, texts[1:]):
+            segment['text'] = text
+
+        if not self.redactors:
+            return result
+
+        redacted_texts = self.redact(texts)
+        redacted = result if drop_raw else {**result, 'segments': [dict(segment) for segment in segments]}
+        redacted['text'] = redacted_texts[0]
+        for segment, text in zip(redacted['segments'], redacted_texts[1:]):
+            if 'words' in segment and text != segment['text']:
+                segment['words'] = [{
+                    'word': f" {text.strip()}",
+                    'start': segment['start'],
+                    'end': segment['end'],
+                    'probability': min((word['probability'] for word in segment['words']), default=0.0)
+                }]
+            segment['text'] = text
+            segment['tokens'] = []
+        return redacted
@@ -0,0 +1,110 @@
+"""
+Helpers for progressive transcription: a fast draft of every file first,
+then a second pass with a larger model that updates the draft rows in place.
+"""
+
+import os
+import math
+import time
+import tempfile
+
+import pandas as pd
+
+
+def refinement_order(rows):
+    """
+    Return the Filenames of rows in the order the second pass should take them.
+
+    Flagged rows come first, then rows from the least to the most confident
+    draft (by Mean Avg Logprob, when present), so the transcripts most likely
+    to change are improved first. Ties keep the draft order.
+    """
+    def priority(indexed_row):
+        index, row = indexed_row
+        logprob = row.get('Mean Avg Logprob', math.nan)
+        if logprob is None or math.isnan(logprob):
+            logprob = 0.0
+        return (not row.get('Flagged', False), logprob, index)
+
+    return [row['Filename'] for _, row in sorted(enumerate(rows), key=priority)]
+
+
+def write_csv_atomic(rows, output_file):
+    """Write rows to a CSV file so that readers never see a partly written file."""
+    output_file = os.fspath(output_file)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_file) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            pd.DataFrame(rows).to_csv(f, index=False)
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ProgressiveTranscripts:
+    """
+    Draft transcript rows that are replaced one by one as better ones arrive.
+
+    The CSV is rewritten at most every min_interval seconds (and on flush),
+    so large studies are not rewritten after every single file. If the CSV
+    cannot be written (e.g. it is open in Excel on Windows), the error is
+    logged and the write is retried on the next update.
+    """
+
+    def __init__(self, rows, output_file, min_interval=30, log=print):
+        self.rows = list(rows)
+        self.output_file = output_file
+        self.min_interval = min_interval
+        self.log = log
+        self._index = {row['Filename']: i for i, row in enumerate(self.rows)}
+        self._dirty = False
+        self._last_write = 0.0
+
+    def update(self, row):
+        """Replace the draft row with the same Filename and write the CSV if due."""
+        index = self._index.get(row['Filename'])
+        if index is None:
+            self._index[row['Filename']] = len(self.rows)
+            self.rows.append(row)
+        else:
+            self.rows[index] = row
+        self._dirty = True
+        if time.monotonic() - self._last_write >= self.min_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the current rows to the CSV if anything changed.
+
+        Returns:
+            False if the CSV could not be written; the rows stay pending
+        """
+        if self._dirty:
+            try:
+                write_csv_atomic(self.rows, self.output_file)
+            except OSError as e:
+                # Keep the last successful write time so the next update retries
+                self.log(f"Could not update {self.output_file} ({e}); will retry")
+                return False
+            self._dirty = False
+        self._last_write = time.monotonic()
+        return True
+
+    def finish(self):
+        """
+        Write the rows a last time.
+
+        If the CSV still cannot be written, the rows are saved next to it as
+        <name>.refined.csv instead, so no refined row is lost.
+
+        Returns:
+            The path the rows were written to
+        """
+        if self.flush():
+            return self.output_file
+        output_file = os.fspath(self.output_file)
+        fallback_file = os.path.splitext(output_file)[0] + ".refined.csv"
+        write_csv_atomic(self.rows, fallback_file)
+        self.log(f"Saved the refined transcripts to {fallback_file} instead")
+        return fallback_file
@@ -0,0 +1,101 @@
+"""
+Per-file quality metrics from the segment statistics of a Whisper result.
+
+The metrics help spot hallucinations such as "Thank you for watching." on
+silent or noisy recordings without listening to every file: text decoded
+from audio Whisper itself considered likely silent, low-confidence text,
+and repetitive text that compresses unusually well.
+"""
+
+import re
+import math
+
+from whisper.utils import compression_ratio
+
+# Default thresholds; they match the fallback thresholds model.transcribe
+# uses, except max_repeated_ngram_rate which has no Whisper equivalent
+DEFAULT_THRESHOLDS = {
+    'min_avg_logprob': -1.0,
+    'max_no_speech_prob': 0.6,
+    'max_compression_ratio': 2.4,
+    'max_repeated_ngram_rate': 0.3,
+}
+
+_WORD = re.compile(r"[\w']+")
+
+
+def repeated_ngram_rate(text, n=3):
+    """Return the fraction of word n-grams in text that repeat an earlier n-gram."""
+    words = _WORD.findall(text.lower())
+    ngrams = [tuple(words[i:i + n]) for i in range(len(words) - n + 1)]
+    if not ngrams:
+        return 0.0
+    return 1 - len(set(ngrams)) / len(ngrams)
+
+
+def quality_metrics(result):
+    """
+    Compute quality metrics for one Whisper result.
+
+    Returns:
+        Dictionary with 'Mean Avg Logprob' (weighted by segment duration),
+        'Max No Speech Prob', 'Compression Ratio' and 'Repeated Ngram Rate'.
+        The segment-based metrics are NaN when there are no segments.
+    """
+    segments = result['segments']
+    text = result['text'].strip()
+
+    mean_logprob = math.nan
+    max_no_speech = math.nan
+    if segments:
+        durations = [max(segment['end'] - segment['start'], 1e-3) for segment in segments]
+        mean_logprob = sum(
+            segment['avg_logprob'] * duration for segment, duration in zip(segments, durations)
+        ) / sum(durations)
+        max_no_speech = max(segment['no_speech_prob'] for segment in segments)
+
+    return {
+        'Mean Avg Logprob': round(mean_logprob, 4),
+        'Max No Speech Prob': round(max_no_speech, 4),
+        'Compression Ratio': round(compression_ratio(text), 4) if text else 0.0,
+        'Repeated Ngram Rate': round(repeated_ngram_rate(text), 4),
+    }
+
+
+def flag_reasons(metrics, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Return the reasons a file should be reviewed (empty if it looks fine).
+
+    Args:
+        metrics: Dictionary returned by quality_metrics
+        thresholds: Dictionary with the keys of DEFAULT_THRESHOLDS
+    """
+    reasons = []
+    # NaN comparisons are False, so files without segments are not flagged
+    if metrics['Mean Avg Logprob'] < thresholds['min_avg_logprob']:
+        reasons.append("low confidence")
+    if metrics['Max No Speech Prob'] > thresholds['max_no_speech_prob'] and metrics['Compression Ratio'] > 0:
+        reasons.append("text on likely silence")
+    if metrics['Compression Ratio'] > thresholds['max_compression_ratio']:
+        reasons.append("high compression ratio")
+    if metrics['Repeated Ngram Rate'] > thresholds['max_repeated_ngram_rate']:
+        reasons.append("repeated phrases")
+    return reasons
+
+
+def parse_thresholds(items):
+    """
+    Parse 'name=value' strings into a thresholds dictionary.
+
+    Unspecified thresholds keep their defaults.
+
+    Raises:
+        ValueError: If a name is unknown or a value is not a number
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for item in items:
+        name, _, value = item.partition('=')
+        if name not in thresholds:
+            raise ValueError(f"Unknown quality threshold '{name}' (expected one of {', '.join(thresholds)})")
+        thresholds[name] = float(value)
+    return thresholds
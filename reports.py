@@ -0,0 +1,150 @@
+"""
+Per-participant and per-day summaries kept up to date during a transcription run.
+
+Counts are accumulated as each file is processed, so the summary can be
+written together with transcripts.csv without loading the transcripts back.
+Workers of a sharded run also write one summary row per file, so that a file
+transcribed by two workers (after a lease expired) is only counted once when
+their reports are merged.
+"""
+
+from collections import defaultdict
+
+import pandas as pd
+
+FILE_COLUMNS = ['Filename', 'Participant ID', 'Date', 'Audio Seconds', 'Words', 'Failed']
+
+
+class StudySummary:
+    """Incremental recording counts per Participant ID and Date."""
+
+    def __init__(self):
+        self._days = defaultdict(lambda: {
+            'Recordings': 0,
+            'Audio Minutes': 0.0,
+            'Words': 0,
+            'Silent Files': 0,
+            'Failed Files': 0
+        })
+        self._files = []
+
+    def add(self, participant_id, date, audio_seconds=0.0, transcript=None, failed=False, filename=None):
+        """
+        Record one processed file.
+
+        Args:
+            participant_id: Participant ID extracted from the filename
+            date: Date extracted from the filename
+            audio_seconds: Duration of the decoded audio
+            transcript: The transcribed text (ignored for failed files)
+            failed: True if the file could not be transcribed
+            filename: Name of the file, kept for the per-file table
+        """
+        words = 0 if failed or not transcript else len(transcript.split())
+        self._add_counts(participant_id, date, audio_seconds, words, failed)
+        self._files.append({
+            'Filename': filename,
+            'Participant ID': participant_id,
+            'Date': date,
+            'Audio Seconds': round(audio_seconds, 3),
+            'Words': words,
+            'Failed': failed
+        })
+
+    def _add_counts(self, participant_id, date, audio_seconds, words, failed):
+        day = self._days[(participant_id, date)]
+        day['Recordings'] += 1
+        day['Audio Minutes'] += audio_seconds / 60
+        if failed:
+            day['Failed Files'] += 1
+            return
+        day['Words'] += words
+        if words == 0:
+            day['Silent Files'] += 1
+
+    def add_file_table(self, df):
+        """Add the files in a table written by by_file (e.g. the de-duplicated files of all workers)."""
+        for row in df.to_dict('records'):
+            self._add_counts(row['Participant ID'], row['Date'], row['Audio Seconds'], row['Words'], row['Failed'])
+            self._files.append({column: row[column] for column in FILE_COLUMNS})
+
+    def add_day_table(self, df):
+        """Add counts from a table written by by_day (e.g. another worker's summary)."""
+        for row in df.to_dict('records'):
+            day = self._days[(row['Participant ID'], row['Date'])]
+            for column in day:
+                day[column] += row[column]
+
+    def by_file(self):
+        """Return a DataFrame with one row per recorded file."""
+        return pd.DataFrame(self._files, columns=FILE_COLUMNS)
+
+    def by_day(self):
+        """Return a DataFrame with one row per participant and date."""
+        rows = [
+            {'Participant ID': participant_id, 'Date': date, **counts}
+            for (participant_id, date), counts in self._days.items()
+        ]
+        columns = ['Participant ID', 'Date', 'Recordings', 'Audio Minutes', 'Words', 'Silent Files', 'Failed Files']
+        df = pd.DataFrame(rows, columns=columns)
+        df['Audio Minutes'] = df['Audio Minutes'].round(2)
+        return df.sort_values(['Participant ID', 'Date'], ignore_index=True)
+
+    def by_participant(self):
+        """
+        Return a DataFrame with one row per participant.
+
+        Missing days are the calendar days between a participant's first and
+        last recording that have no recording. They can only be detected when
+        the Date field parses as a date; otherwise the columns are left empty.
+        """
+        days = self.by_day()
+        days['Parsed Date'] = pd.to_datetime(days['Date'], errors='coerce', format='mixed')
+
+        rows = []
+        for participant_id, group in days.groupby('Participant ID', sort=True):
+            parsed = group['Parsed Date'].dropna()
+            row = {
+                'Participant ID': participant_id,
+                'Recordings': group['Recordings'].sum(),
+                'Days Recorded': len(group),
+                'Audio Minutes': round(group['Audio Minutes'].sum(), 2),
+                'Words': group['Words'].sum(),
+                'Silent Files': group['Silent Files'].sum(),
+                'Failed Files': group['Failed Files'].sum(),
+                'First Date': '',
+                'Last Date': '',
+                'Missing Days': '',
+                'Missing Dates': ''
+            }
+            if not parsed.empty:
+                expected = pd.date_range(parsed.min(), parsed.max(), freq='D')
+                missing = expected.difference(pd.DatetimeIndex(parsed.dt.normalize()))
+                row['First Date'] = parsed.min().strftime('%Y-%m-%d')
+                row['Last Date'] = parsed.max().strftime('%Y-%m-%d')
+                row['Missing Days'] = len(missing)
+                row['Missing Dates'] = ';'.join(missing.strftime('%Y-%m-%d'))
+            rows.append(row)
+
+        return pd.DataFrame(rows)
+
+    def write(self, output_folder, suffix="", include_files=False):
+        """
+        Write summary_by_day.csv and summary_by_participant.csv.
+
+        Args:
+            output_folder: Folder to write the reports to
+            suffix: Added before the extension, e.g. ".shard-a" for a worker's reports
+            include_files: Also write summary_files.csv with one row per file,
+                           which merge_shard_outputs uses to combine workers
+
+        Returns:
+            Tuple of the two output file paths
+        """
+        day_file = output_folder / f"summary_by_day{suffix}.csv"
+        participant_file = output_folder / f"summary_by_participant{suffix}.csv"
+        self.by_day().to_csv(day_file, index=False)
+        self.by_participant().to_csv(participant_file, index=False)
+        if include_files:
+            self.by_file().to_csv(output_folder / f"summary_files{suffix}.csv", index=False)
+        return day_file, participant_file
@@ -0,0 +1,225 @@
+"""
+Shared manifest for splitting one transcription job across several workers.
+
+Workers on different machines (or several local processes) point at the same
+SQLite manifest, claim files one at a time under a time-limited lease and
+write their rows to their own shard CSV. A file whose lease expires (for
+example because its worker crashed) is handed out again. When every worker
+is done, merge_shard_outputs combines the shard CSVs into transcripts.csv.
+"""
+
+import time
+import sqlite3
+
+import pandas as pd
+
+from reports import StudySummary
+
+SHARD_PREFIX = "transcripts.shard-"
+
+
+class ShardManifest:
+    """SQLite-backed work queue with lease-based claims."""
+
+    def __init__(self, db_path, lease_seconds=1800, max_attempts=3):
+        self.db_path = str(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Autocommit mode; claims use explicit BEGIN IMMEDIATE transactions.
+        # The default rollback journal is used because WAL does not work on
+        # network filesystems.
+        self.conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        self._restricted = False
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+    def add_files(self, names):
+        """Register files; names that are already in the manifest are kept as they are."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO files (name) VALUES (?)",
+                ((name,) for name in names)
+            )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def restrict_to(self, names):
+        """
+        Only claim files in names from now on, e.g. the files this worker can see.
+
+        Other workers may register files this one cannot read (newly arrived
+        uploads, or a reused manifest); those are left for them. The list is
+        kept in a temporary table of this connection only.
+        """
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS claimable (name TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM claimable")
+        self.conn.executemany("INSERT OR IGNORE INTO claimable (name) VALUES (?)", ((name,) for name in names))
+        self._restricted = True
+
+    def claim(self, worker_id):
+        """
+        Claim the next available file for worker_id.
+
+        A file is available if it is pending, or if it was claimed but its
+        lease has expired and it has not used up its attempts. After
+        restrict_to, only the given files are claimed.
+
+        Returns:
+            The file name, or None when there is nothing left to claim
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                """
+                SELECT name FROM files
+                WHERE (status = 'pending' OR (status = 'claimed' AND lease_expires < ?))
+                  AND attempts < ?
+                  {restriction}
+                ORDER BY name
+                LIMIT 1
+                """.format(restriction="AND name IN (SELECT name FROM claimable)" if self._restricted else ""),
+                (now, self.max_attempts)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                """
+                UPDATE files
+                SET status = 'claimed', worker = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE name = ?
+                """,
+                (worker_id, now + self.lease_seconds, row[0])
+            )
+            self.conn.execute("COMMIT")
+            return row[0]
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _finish(self, name, worker_id, status):
+        self.conn.execute(
+            "UPDATE files SET status = ?, lease_expires = NULL WHERE name = ? AND worker = ?",
+            (status, name, worker_id)
+        )
+
+    def complete(self, name, worker_id):
+        """Mark a claimed file as transcribed."""
+        self._finish(name, worker_id, 'done')
+
+    def fail(self, name, worker_id):
+        """Mark a claimed file as failed so it is not handed out again."""
+        self._finish(name, worker_id, 'failed')
+
+    def counts(self):
+        """Return a dictionary of file counts per status."""
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall())
+
+    def unfinished(self):
+        """
+        Return the files that are not done, with the reason, ordered by name.
+
+        Returns:
+            List of (file name, reason) tuples
+        """
+        now = time.time()
+        rows = self.conn.execute(
+            "SELECT name, status, worker, lease_expires, attempts FROM files WHERE status != 'done' ORDER BY name"
+        ).fetchall()
+        unfinished = []
+        for name, status, worker, lease_expires, attempts in rows:
+            if status == 'failed':
+                reason = f"failed on {worker}"
+            elif status == 'pending':
+                reason = "never claimed"
+            elif lease_expires is not None and lease_expires >= now:
+                reason = f"still claimed by {worker}"
+            elif attempts >= self.max_attempts:
+                reason = f"lease expired {attempts} times; no attempts left"
+            else:
+                reason = f"lease of {worker} expired; can be claimed again"
+            unfinished.append((name, reason))
+        return unfinished
+
+    def close(self):
+        self.conn.close()
+
+
+def shard_output_file(output_folder, worker_id):
+    """Return the shard CSV path for a worker."""
+    return output_folder / f"{SHARD_PREFIX}{worker_id}.csv"
+
+
+def append_shard_row(output_folder, worker_id, row):
+    """Append one transcript row to the worker's shard CSV."""
+    shard_file = shard_output_file(output_folder, worker_id)
+    pd.DataFrame([row]).to_csv(shard_file, mode='a', header=not shard_file.exists(), index=False)
+
+
+def merge_shard_outputs(output_folder):
+    """
+    Combine all shard CSVs in output_folder into transcripts.csv.
+
+    Rows are ordered by Filename. If a file was transcribed by more than one
+    worker (after a lease expired), the row from the first shard in name
+    order is kept, so the result does not depend on which worker finished
+    first. Per-shard summary reports, if present, are combined as well,
+    counting each file once.
+
+    Returns:
+        Tuple of (output file path, number of rows), or (None, 0) if there
+        were no shard files
+    """
+    shard_files = sorted(output_folder.glob(f"{SHARD_PREFIX}*.csv"))
+    if not shard_files:
+        return None, 0
+
+    df = pd.concat(
+        [pd.read_csv(f, dtype=str, keep_default_na=False).assign(_shard=f.name) for f in shard_files],
+        ignore_index=True
+    )
+    df = (
+        df.sort_values(['Filename', '_shard'], kind='stable')
+        .drop_duplicates(subset='Filename', keep='first')
+        .drop(columns='_shard')
+    )
+    output_file = output_folder / "transcripts.csv"
+    df.to_csv(output_file, index=False)
+
+    # Summaries are rebuilt from the per-file tables with the same
+    # de-duplication as the transcripts, preferring a successful attempt
+    file_tables = sorted(output_folder.glob("summary_files.shard-*.csv"))
+    day_files = sorted(output_folder.glob("summary_by_day.shard-*.csv"))
+    if file_tables:
+        files = pd.concat(
+            [pd.read_csv(f, dtype={'Filename': str, 'Participant ID': str, 'Date': str},
+                         keep_default_na=False).assign(_shard=f.name) for f in file_tables],
+            ignore_index=True
+        )
+        files = (
+            files.sort_values(['Filename', 'Failed', '_shard'], kind='stable')
+            .drop_duplicates(subset='Filename', keep='first')
+        )
+        summary = StudySummary()
+        summary.add_file_table(files)
+        summary.write(output_folder)
+    elif day_files:
+        # Reports from workers that did not write per-file tables
+        summary = StudySummary()
+        for day_file in day_files:
+            summary.add_day_table(pd.read_csv(day_file, dtype={'Participant ID': str, 'Date': str},
+                                              keep_default_na=False))
+        summary.write(output_folder)
+
+    return output_file, len(df)
@@ -0,0 +1,74 @@
+import pytest
+
+from postprocess import TextPostProcessor, name_redactor, redact_emails, redact_phone_numbers
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("write to jane.doe@example.org today", "write to [EMAIL] today"),
+    ("email jane dot doe at gmail dot com please", "email [EMAIL] please"),
+    ("it is jdoe42 at yahoo dot com", "it is [EMAIL]"),
+])
+def test_redact_emails_hits(text, expected):
+    assert redact_emails([text]) == [expected]
+
+
+@pytest.mark.parametrize("text", [
+    "I will look at google dot com later",
+    "We met at school dot edu events",
+    "I'm at google dot com",
+    "see you at noon",
+])
+def test_redact_emails_misses(text):
+    assert redact_emails([text]) == [text]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("call 404-555-0123 now", "call [PHONE] now"),
+    ("(404) 555 0123", "[PHONE]"),
+    ("+1 404.555.0123", "[PHONE]"),
+    ("4045550123", "[PHONE]"),
+])
+def test_redact_phone_numbers_hits(text, expected):
+    assert redact_phone_numbers([text]) == [expected]
+
+
+@pytest.mark.parametrize("text", [
+    "in 2024 we had 12 people",
+    "ID 12345678",
+    "version 1.2.3",
+])
+def test_redact_phone_numbers_misses(text):
+    assert redact_phone_numbers([text]) == [text]
+
+
+def test_name_redactor_matches_whole_names_longest_first():
+    redact = name_redactor(["Mary", "Mary Ann"])
+    assert redact(["Mary Ann went to Maryland with mary"]) == ["[NAME] went to Maryland with [NAME]"]
+
+
+def test_batch_keeps_texts_separate():
+    texts = ["call 404-555-0123", "", "jane at gmail dot com"]
+    assert redact_phone_numbers(texts) == ["call [PHONE]", "", texts[2]]
+    assert redact_emails(texts) == [texts[0], "", "[EMAIL]"]
+
+
+def test_process_result_drop_raw_redacts_in_place():
+    result = {
+        'text': " Call me at 404-555-0123.",
+        'segments': [{'text': " Call me at 404-555-0123.", 'start': 0.0, 'end': 2.0, 'tokens': [1, 2, 3]}],
+    }
+    processor = TextPostProcessor.from_options(normalize=True, redact=['phone'])
+
+    redacted = processor.process_result(result, drop_raw=True)
+
+    assert redacted is result
+    assert result['text'] == "Call me at [PHONE]."
+    assert result['segments'][0]['text'] == "Call me at [PHONE]."
+    assert result['segments'][0]['tokens'] == []
+
+
+def test_process_result_keeps_raw_by_default():
+    result = {'text': "call 404-555-0123", 'segments': [{'text': "call 404-555-0123", 'tokens': [1]}]}
+    redacted = TextPostProcessor.from_options(redact=['phone']).process_result(result)
+    assert result['text'] == "call 404-555-0123"
+    assert redacted['text'] == "call [PHONE]"
@@ -0,0 +1,129 @@
+import pandas as pd
+import pytest
+
+import sharding
+from reports import StudySummary
+from sharding import ShardManifest, append_shard_row, merge_shard_outputs
+
+
+class FakeClock:
+    """Stands in for the time module so lease expiry needs no sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(sharding, 'time', fake)
+    return fake
+
+
+@pytest.fixture
+def manifest(tmp_path, clock):
+    manifest = ShardManifest(tmp_path / "manifest.sqlite", lease_seconds=60, max_attempts=3)
+    manifest.add_files(["b.wav", "a.wav", "c.wav"])
+    yield manifest
+    manifest.close()
+
+
+def test_claims_each_file_once_in_name_order(manifest):
+    assert [manifest.claim("w1") for _ in range(4)] == ["a.wav", "b.wav", "c.wav", None]
+
+
+def test_add_files_keeps_existing_status(manifest):
+    manifest.claim("w1")
+    manifest.complete("a.wav", "w1")
+    manifest.add_files(["a.wav", "d.wav"])
+    assert manifest.counts() == {'done': 1, 'pending': 3}
+
+
+def test_expired_lease_is_reclaimed(manifest, clock):
+    assert manifest.claim("w1") == "a.wav"
+    clock.now += 30
+    assert manifest.claim("w2") == "b.wav"
+    clock.now += 31
+    # w1's lease on a.wav has expired, w2's lease on b.wav has not
+    assert manifest.claim("w2") == "a.wav"
+
+
+def test_file_is_abandoned_after_max_attempts(manifest, clock):
+    manifest.restrict_to(["a.wav"])
+    for _ in range(3):
+        assert manifest.claim("w1") == "a.wav"
+        clock.now += 61
+    assert manifest.claim("w1") is None
+    assert manifest.unfinished()[0] == ("a.wav", "lease expired 3 times; no attempts left")
+
+
+def test_stale_worker_complete_is_ignored(manifest, clock):
+    manifest.restrict_to(["a.wav"])
+    assert manifest.claim("w1") == "a.wav"
+    clock.now += 61
+    assert manifest.claim("w2") == "a.wav"
+
+    manifest.complete("a.wav", "w1")
+    assert manifest.counts().get('done') is None
+    assert ("a.wav", "still claimed by w2") in manifest.unfinished()
+
+    manifest.complete("a.wav", "w2")
+    assert manifest.counts()['done'] == 1
+
+
+def test_failed_file_is_not_handed_out_again(manifest):
+    manifest.restrict_to(["a.wav"])
+    manifest.claim("w1")
+    manifest.fail("a.wav", "w1")
+    assert manifest.claim("w2") is None
+    assert manifest.unfinished()[0] == ("a.wav", "failed on w1")
+
+
+def test_restrict_to_skips_files_this_worker_cannot_see(manifest):
+    manifest.restrict_to(["c.wav"])
+    assert manifest.claim("w1") == "c.wav"
+    assert manifest.claim("w1") is None
+    assert manifest.counts() == {'claimed': 1, 'pending': 2}
+
+
+def row(filename, transcript):
+    return {'Filename': filename, 'Participant ID': filename[:4], 'Date': '2024-01-01',
+            'Time': '10-00-00', 'Transcript': transcript}
+
+
+def test_merge_orders_by_filename_and_keeps_first_shard(tmp_path):
+    append_shard_row(tmp_path, "b", row("P002_x.wav", "from b"))
+    append_shard_row(tmp_path, "b", row("P001_x.wav", "duplicate from b"))
+    append_shard_row(tmp_path, "a", row("P003_x.wav", "from a"))
+    append_shard_row(tmp_path, "a", row("P001_x.wav", "from a"))
+
+    output_file, row_count = merge_shard_outputs(tmp_path)
+
+    merged = pd.read_csv(output_file)
+    assert row_count == 3
+    assert list(merged['Filename']) == ["P001_x.wav", "P002_x.wav", "P003_x.wav"]
+    assert list(merged['Transcript']) == ["from a", "from b", "from a"]
+
+
+def test_merge_counts_each_file_once_in_summaries(tmp_path):
+    shard_a = StudySummary()
+    shard_a.add("P001", "2024-01-01", 60.0, "one two three", filename="P001_x.wav")
+    shard_a.add("P001", "2024-01-01", 30.0, failed=True, filename="P001_y.wav")
+    shard_b = StudySummary()
+    # Both files again, after their leases expired; only P001_y succeeded here
+    shard_b.add("P001", "2024-01-01", 60.0, "one two three", filename="P001_x.wav")
+    shard_b.add("P001", "2024-01-01", 30.0, "four five", filename="P001_y.wav")
+    for worker, summary in (("a", shard_a), ("b", shard_b)):
+        append_shard_row(tmp_path, worker, row("P001_x.wav", "one two three"))
+        summary.write(tmp_path, f".shard-{worker}", include_files=True)
+
+    merge_shard_outputs(tmp_path)
+
+    by_day = pd.read_csv(tmp_path / "summary_by_day.csv")
+    assert by_day.loc[0, 'Recordings'] == 2
+    assert by_day.loc[0, 'Audio Minutes'] == 1.5
+    assert by_day.loc[0, 'Words'] == 5
+    assert by_day.loc[0, 'Failed Files'] == 0
@@ -1,12 +1,16 @@
 import os
 import whisper
-import pandas as pd
 from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox, scrolledtext
 import threading
 import sys
 import subprocess
+from progressive import ProgressiveTranscripts, refinement_order, write_csv_atomic
+from quality import quality_metrics, flag_reasons
+from autotune import apply_host_profile, set_torch_threads
+from inputs import (discover_audio_inputs, input_display_name, is_bulk_input, close_archives,
+                    ARCHIVE_SUFFIXES, MANIFEST_SUFFIXES)
 
 # Try to import tkinterdnd2 for drag & drop support
 try:
@@ -158,6 +162,12 @@ class TranscriptionApp:
                                command=self.select_folder_dialog,
                                style="Section.TButton")
         select_btn.grid(row=1, column=0, pady=6)
+        
+        # Zip/tar archives and CSV/JSONL manifests can be used without extracting them
+        select_archive_btn = ttk.Button(self.drop_frame, text="Select Archive or Manifest",
+                                        command=self.select_archive_dialog,
+                                        style="Section.TButton")
+        select_archive_btn.grid(row=3, column=0, pady=(6, 0))
 
         # File type indicator inside drop area
         self.filetype_label = ttk.Label(
@@ -219,6 +229,25 @@ class TranscriptionApp:
         filetype_combo.grid(row=5, column=1, sticky=tk.W, pady=(10, 5))
         filetype_combo.bind("<<ComboboxSelected>>", lambda e: self.update_filetype_label())
         
+        # Progressive mode: fast tiny-model draft, then refine with a larger model
+        self.progressive_var = tk.BooleanVar(value=False)
+        progressive_check = ttk.Checkbutton(
+            config_frame,
+            text="Fast draft first, then refine with:",
+            variable=self.progressive_var,
+        )
+        progressive_check.grid(row=6, column=0, sticky=tk.W, pady=(10, 5))
+        self.refine_model_var = tk.StringVar(value="small")
+        refine_combo = ttk.Combobox(
+            config_frame,
+            textvariable=self.refine_model_var,
+            state="readonly",
+            values=["base", "small", "medium", "large"],
+            width=18,
+            style="Custom.TCombobox",
+        )
+        refine_combo.grid(row=6, column=1, sticky=tk.W, pady=(10, 5))
+        
         # Progress section
         progress_frame = ttk.LabelFrame(main_frame, text="Progress", padding="12", style="Card.TLabelframe")
         progress_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(0, 20))
@@ -322,8 +351,8 @@ class TranscriptionApp:
         # Get dropped path
         dropped_path = event.data.strip('{}')
         
-        # Check if it's a folder
-        if os.path.isdir(dropped_path):
+        # Check if it's a folder, or an archive/manifest of audio files
+        if os.path.isdir(dropped_path) or is_bulk_input(dropped_path):
             self.set_selected_folder(dropped_path)
         else:
             # If it's a file, use its parent directory
@@ -343,22 +372,39 @@ class TranscriptionApp:
         if folder:
             self.set_selected_folder(folder)
     
+    def select_archive_dialog(self):
+        """Open a file dialog for a zip/tar archive or a CSV/JSONL manifest."""
+        if self.is_processing:
+            messagebox.showwarning("Processing", "Please wait for current transcription to finish.")
+            return
+        
+        patterns = " ".join(f"*{suffix}" for suffix in ARCHIVE_SUFFIXES + MANIFEST_SUFFIXES)
+        path = filedialog.askopenfilename(
+            title="Select an archive or manifest of audio files",
+            filetypes=[("Archives and manifests", patterns), ("All files", "*")]
+        )
+        if path:
+            self.set_selected_folder(path)
+    
     def set_selected_folder(self, folder_path):
-        """Set the selected folder and update UI."""
+        """Set the selected folder (or archive/manifest) and update UI."""
+        # Count audio files (respecting selected file type filter)
+        selected_exts = self.get_selected_extensions()
+        try:
+            audio_inputs = discover_audio_inputs(folder_path, selected_exts)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not read {folder_path}:\n{e}")
+            return
+        
         self.selected_folder = folder_path
-        folder_name = os.path.basename(folder_path.rstrip('/\\'))
-        self.drop_label.config(text=f"📁 {folder_name}", foreground="green")
+        folder_name = input_display_name(folder_path)
+        icon = "📁" if os.path.isdir(folder_path) else "🗜"
+        self.drop_label.config(text=f"{icon} {folder_name}", foreground="green")
         self.transcribe_btn.config(state=tk.NORMAL)
-        self.log_message(f"Selected folder: {folder_path}")
+        self.log_message(f"Selected: {folder_path}")
         
-        # Count audio files (respecting selected file type filter)
-        selected_exts = self.get_selected_extensions()
-        audio_files = [
-            f for f in os.listdir(folder_path)
-            if os.path.splitext(f.lower())[1] in selected_exts
-        ]
         self.log_message(
-            f"Found {len(audio_files)} audio file(s) in folder "
+            f"Found {len(audio_inputs)} audio file(s) "
             f"matching {', '.join(sorted(selected_exts))}"
         )
         self.update_filetype_label()
@@ -430,27 +476,100 @@ class TranscriptionApp:
         thread = threading.Thread(target=self.transcribe_files, daemon=True)
         thread.start()
     
+    def get_output_file(self):
+        """Return the CSV path for the current selection."""
+        # Save transcripts in the selected folder (no extra folder),
+        # or next to the selected archive/manifest
+        if os.path.isdir(self.selected_folder):
+            return Path(self.selected_folder) / "transcripts.csv"
+        source = Path(self.selected_folder)
+        return source.parent / f"{input_display_name(source)}_transcripts.csv"
+    
+    def transcribe_pass(self, model, model_name, audio_files, filename_config,
+                        record_model=False, scores=None, on_row=None, progress_range=(0, 100)):
+        """
+        Transcribe audio_files with one model and return the result rows.
+        
+        With record_model, each row gets a Model column. If scores is a
+        dictionary, it is filled with the quality metrics of each file.
+        on_row is called with each row as soon as it is ready.
+        """
+        results = []
+        progress_start, progress_end = progress_range
+        
+        # Transcribe each file
+        for idx, audio_input in enumerate(audio_files, 1):
+            filename = audio_input.name
+            self.log_message(f"Transcribing {idx}/{len(audio_files)} ({model_name}): {filename}")
+            self.progress_var.set(progress_start + (idx - 1) / len(audio_files) * (progress_end - progress_start))
+            self.root.update_idletasks()
+            
+            try:
+                # Archive members are piped into FFmpeg without extracting them
+                audio = audio_input.load_audio()
+                result = model.transcribe(audio)
+                transcript = result["text"]
+                
+                participant_id, date, time = self.extract_filename_info(audio_input.basename, filename_config)
+                
+                row = {
+                    'Filename': filename,
+                    'Participant ID': participant_id,
+                    'Date': date,
+                    'Time': time,
+                    'Transcript': transcript
+                }
+                if record_model:
+                    row['Model'] = model_name
+                results.append(row)
+                
+                if scores is not None:
+                    metrics = quality_metrics(result)
+                    scores[filename] = {**metrics, 'Flagged': bool(flag_reasons(metrics))}
+                if on_row:
+                    on_row(row)
+                
+                self.log_message(f"✓ Completed: {filename}")
+            except Exception as e:
+                self.log_message(f"✗ Error transcribing {filename}: {str(e)}")
+                continue
+        
+        return results
+    
     def transcribe_files(self):
         """Transcribe audio files (runs in background thread)."""
         try:
-            self.log_message("Loading Whisper model...")
+            # Progressive mode: a fast draft of everything first, then a
+            # second pass with a larger model that updates the CSV in place
+            progressive = self.progressive_var.get()
+            model_name = "tiny" if progressive else "base"
+            
+            # Use the thread count measured by autotune.py; without a profile,
+            # leave one core free so the window stays responsive
+            profiled_model = self.refine_model_var.get() if progressive else model_name
+            threads = apply_host_profile(for_gui=True, model_name=profiled_model, log=self.log_message)
+            if threads:
+                self.log_message(f"Using {threads} CPU thread(s) from the host profile")
+            else:
+                threads = max(1, (os.cpu_count() or 1) - 1)
+                set_torch_threads(threads)
+                self.log_message(f"Using {threads} CPU thread(s) (run autotune.py to calibrate this computer)")
+            
+            self.log_message(f"Loading Whisper model ({model_name})...")
             self.status_label.config(text="Loading model...")
             self.root.update_idletasks()
             
-            model = whisper.load_model("base")
+            model = whisper.load_model(model_name)
             
             self.log_message("Model loaded successfully!")
-            self.status_label.config(text="Transcribing...")
+            self.status_label.config(text="Transcribing draft..." if progressive else "Transcribing...")
             
             # Get filename config
             filename_config = self.get_filename_config()
             
-            # Get audio files, filtered by selected file type
+            # Get audio files (from a folder, archive or manifest), filtered by selected file type
             selected_exts = self.get_selected_extensions()
-            audio_files = [
-                f for f in os.listdir(self.selected_folder)
-                if os.path.splitext(f.lower())[1] in selected_exts
-            ]
+            audio_files = discover_audio_inputs(self.selected_folder, selected_exts)
             
             if not audio_files:
                 self.log_message("No audio files found in selected folder.")
@@ -461,45 +580,46 @@ class TranscriptionApp:
             
             self.log_message(f"Found {len(audio_files)} audio file(s) to transcribe")
             
-            results = []
-            
-            # Transcribe each file
-            for idx, filename in enumerate(audio_files, 1):
-                self.log_message(f"Transcribing {idx}/{len(audio_files)}: {filename}")
-                self.progress_var.set((idx - 1) / len(audio_files) * 100)
-                self.root.update_idletasks()
-                
-                file_path = os.path.join(self.selected_folder, filename)
-                
-                try:
-                    result = model.transcribe(file_path)
-                    transcript = result["text"]
-                    
-                    participant_id, date, time = self.extract_filename_info(filename, filename_config)
-                    
-                    results.append({
-                        'Filename': filename,
-                        'Participant ID': participant_id,
-                        'Date': date,
-                        'Time': time,
-                        'Transcript': transcript
-                    })
-                    
-                    self.log_message(f"✓ Completed: {filename}")
-                except Exception as e:
-                    self.log_message(f"✗ Error transcribing {filename}: {str(e)}")
-                    continue
+            scores = {} if progressive else None
+            results = self.transcribe_pass(
+                model, model_name, audio_files, filename_config,
+                record_model=progressive,
+                scores=scores,
+                progress_range=(0, 50) if progressive else (0, 100)
+            )
             
             # Save results
             if results:
                 self.log_message("\nSaving results to CSV...")
                 self.status_label.config(text="Saving results...")
                 
-                # Save transcripts in the selected folder (no extra folder)
-                output_folder = Path(self.selected_folder)
-                df = pd.DataFrame(results)
-                output_file = output_folder / "transcripts.csv"
-                df.to_csv(output_file, index=False)
+                output_file = self.get_output_file()
+                write_csv_atomic(results, output_file)
+                
+                refined = []
+                if progressive:
+                    refine_model_name = self.refine_model_var.get()
+                    self.log_message("\n" + "="*60)
+                    self.log_message(f"Draft complete! You can open {output_file} now.")
+                    self.log_message(f"Refining with the {refine_model_name} model; rows are updated in place.")
+                    self.log_message("="*60)
+                    self.status_label.config(text=f"Draft saved – refining with {refine_model_name}...")
+                    
+                    # Free the draft model before loading the larger one
+                    del model
+                    model = whisper.load_model(refine_model_name)
+                    
+                    # Most doubtful drafts first
+                    transcripts = ProgressiveTranscripts(results, output_file, log=self.log_message)
+                    order = refinement_order([{'Filename': name, **score} for name, score in scores.items()])
+                    inputs_by_name = {audio_input.name: audio_input for audio_input in audio_files}
+                    refined = self.transcribe_pass(
+                        model, refine_model_name, [inputs_by_name[name] for name in order], filename_config,
+                        record_model=True,
+                        on_row=transcripts.update,
+                        progress_range=(50, 100)
+                    )
+                    output_file = transcripts.finish()
                 
                 self.progress_var.set(100)
                 self.status_label.config(text="Complete!")
@@ -507,6 +627,8 @@ class TranscriptionApp:
                 self.log_message("\n" + "="*60)
                 self.log_message("Transcription complete!")
                 self.log_message(f"Files transcribed: {len(results)}")
+                if progressive:
+                    self.log_message(f"Files refined with {refine_model_name}: {len(refined)}")
                 self.log_message(f"Output file: {output_file}")
                 self.log_message("="*60)
                 
@@ -537,6 +659,8 @@ class TranscriptionApp:
             else:
                 messagebox.showerror("Error", f"An error occurred:\n{error_msg}")
         finally:
+            # Release open archives so they can be moved or deleted during the session
+            close_archives()
             self.is_processing = False
             self.transcribe_btn.config(state=tk.NORMAL)
 
@@ -1,8 +1,28 @@
 import os
+import socket
+from collections import Counter
+import argparse
+import multiprocessing
 import whisper
 import pandas as pd
 from pathlib import Path
 from tkinter import filedialog, Tk
+from whisper.utils import get_writer
+from audio_cache import AudioCache
+from inputs import discover_audio_inputs, input_display_name, is_bulk_input, close_archives
+from reports import StudySummary
+from diarization import EMBEDDING_CACHE_KEY, window_embeddings, label_segments, speaker_transcript, with_speaker_prefixes
+from postprocess import TextPostProcessor, REDACTORS
+from quality import quality_metrics, flag_reasons, parse_thresholds, DEFAULT_THRESHOLDS
+from progressive import ProgressiveTranscripts, refinement_order, write_csv_atomic
+from sharding import ShardManifest, append_shard_row, merge_shard_outputs, shard_output_file
+from autotune import load_host_profile, check_profile_model, threads_per_worker, set_torch_threads
+
+# Sidecar formats that can be written next to transcripts.csv
+SIDECAR_FORMATS = ('srt', 'vtt', 'json')
+
+# Unfinished files listed after merging shards; the rest are only counted
+MAX_LISTED_FILES = 50
 
 def select_folder():
     """Prompt the user to select a folder containing audio files."""
@@ -90,23 +110,111 @@ def extract_filename_info(filename, config):
     
     return participant_id, date, time
 
-def transcribe_audio_files(input_folder, output_folder, filename_config):
-    """Transcribe all audio files in the input folder."""
+def write_sidecar_files(result, filename, output_folder, output_formats, word_timestamps=False):
+    """
+    Write per-file sidecar outputs (SRT/VTT/JSON) from a Whisper result.
+    
+    Args:
+        result: The dictionary returned by model.transcribe
+        filename: The audio filename (used to name the sidecar files)
+        output_folder: Folder where the sidecar files are written
+        output_formats: Iterable of formats from SIDECAR_FORMATS
+        word_timestamps: Whether word-level timing is available in the result
+    """
+    # Split subtitle cues per word only when word timings were requested
+    options = {
+        'highlight_words': word_timestamps,
+        'max_line_width': None,
+        'max_line_count': None,
+        'max_words_per_line': None
+    }
+    # Subtitles have no speaker field, so diarized cues carry the label in the text
+    diarized = bool(result['segments']) and 'speaker' in result['segments'][0]
+    for output_format in output_formats:
+        writer = get_writer(output_format, str(output_folder))
+        if diarized and output_format != 'json':
+            writer(with_speaker_prefixes(result), filename, options)
+        else:
+            writer(result, filename, options)
+
+def transcribe_audio_files(input_folder, output_folder, filename_config,
+                           output_formats=(), word_timestamps=False,
+                           model_name="base", cache_dir=None, cache_mel=False,
+                           summary_report=False, shard_manifest=None, worker_id=None,
+                           lease_seconds=1800, diarize=False, normalize_text=False,
+                           redact=(), redact_names_file=None, drop_raw=False,
+                           score_quality=False, quality_thresholds=None, retranscribe_model=None,
+                           record_model=False, only_files=None, on_row=None, torch_threads=None,
+                           summary=None):
+    """
+    Transcribe all audio files in the input folder.
+    
+    input_folder may also be a zip/tar archive or a CSV/JSONL manifest of
+    audio paths; archive members are decoded without extracting them.
+    
+    Sidecar files in output_formats are written to output_folder from the
+    same model.transcribe result that fills the transcript rows. When
+    cache_dir is set, decoded audio is stored there and reused by later runs;
+    with cache_mel, so is the log-mel spectrogram speaker labelling is computed
+    from (instead of the speaker embeddings themselves).
+    When summary_report is set, per-participant and per-day counts are kept
+    during the run and written to output_folder at the end. Files can
+    instead be recorded into an existing StudySummary passed as summary,
+    which is then left for the caller to write.
+    
+    When shard_manifest is set, files are claimed one at a time from that
+    shared SQLite manifest instead of processing the whole folder, and each
+    row is appended to this worker's shard CSV as soon as it is transcribed.
+    
+    When diarize is set, segments are labelled with speakers using spectral
+    embeddings of the decoded audio; the embeddings are cached per file in
+    cache_dir, or in a speaker_embeddings folder inside output_folder.
+    
+    normalize_text, redact and redact_names_file set up text post-processing
+    of each result; redacted text goes into 'Redacted ...' columns. With
+    drop_raw, each result is redacted in place before anything is written,
+    so no output (CSV, shard or sidecar file) contains the unredacted text.
+    
+    When score_quality is set, quality metrics from the segment statistics
+    are added to each row and files outside quality_thresholds are flagged.
+    Flagged files are transcribed again with retranscribe_model, if given,
+    reusing the decoded audio.
+    
+    only_files restricts the run to these file names, processed in the given
+    order; on_row is called with each row as soon as it is produced. With
+    record_model, a Model column records which model produced each row.
+    
+    torch_threads sets the number of CPU threads torch uses in this process
+    (torch's default is one per core).
+    """
+    if torch_threads:
+        set_torch_threads(torch_threads)
+    
     # Load the Whisper model
-    print("Loading Whisper model...")
-    model = whisper.load_model("base")  # You can choose "tiny", "base", "small", "medium", or "large"
+    print(f"Loading Whisper model ({model_name})...")
+    model = whisper.load_model(model_name)  # You can choose "tiny", "base", "small", "medium", or "large"
+    
+    audio_cache = AudioCache(cache_dir) if cache_dir else None
+    write_summary = summary is None and summary_report
+    if write_summary:
+        summary = StudySummary()
+    postprocessor = None
+    if normalize_text or redact or redact_names_file:
+        postprocessor = TextPostProcessor.from_options(normalize_text, redact, redact_names_file)
+    keep_raw = not (drop_raw and postprocessor and postprocessor.redacts)
+    score_quality = score_quality or bool(retranscribe_model)
+    quality_thresholds = quality_thresholds or DEFAULT_THRESHOLDS
+    retranscribe_whisper_model = None
+    embedding_cache = None
+    if diarize:
+        embedding_cache = audio_cache or AudioCache(output_folder / "speaker_embeddings")
     
     # Create a list to store the results
     results = []
     
-    # Supported audio file extensions
-    audio_extensions = {'.wav', '.mp3', '.aac', '.m4a', '.flac', '.ogg', '.wma'}
-    
-    # Get all audio files in the folder
-    audio_files = [
-        f for f in os.listdir(input_folder)
-        if os.path.splitext(f.lower())[1] in audio_extensions
-    ]
+    # Get all audio files in the folder, archive or manifest
+    audio_inputs = {audio_input.name: audio_input for audio_input in discover_audio_inputs(input_folder)}
+    audio_files = list(audio_inputs)
     
     if not audio_files:
         print(f"No audio files found in {input_folder}")
@@ -114,41 +222,423 @@ def transcribe_audio_files(input_folder, output_folder, filename_config):
     
     print(f"Found {len(audio_files)} audio file(s) to transcribe...")
     
+    # The same filename can appear in several folders of an archive or
+    # manifest; those files' sidecars go into matching subfolders
+    basename_counts = Counter(audio_input.basename for audio_input in audio_inputs.values())
+    
+    manifest = None
+    if shard_manifest:
+        # Register the files (other workers may already have done so) and
+        # claim them one at a time until the manifest has nothing left
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        manifest = ShardManifest(shard_manifest, lease_seconds=lease_seconds)
+        manifest.add_files(sorted(audio_files))
+        # Files registered by other workers that this one cannot see are left to them
+        manifest.restrict_to(audio_files)
+        files_to_process = iter(lambda: manifest.claim(worker_id), None)
+        print(f"Worker {worker_id} claiming files from {shard_manifest}")
+    elif only_files is not None:
+        files_to_process = [name for name in only_files if name in audio_inputs]
+    else:
+        files_to_process = audio_files
+    
     # Iterate through all audio files in the folder
-    for idx, filename in enumerate(audio_files, 1):
-        print(f"Transcribing {idx}/{len(audio_files)}: {filename}")
+    for idx, filename in enumerate(files_to_process, 1):
+        if manifest:
+            print(f"[{worker_id}] Transcribing file {idx}: {filename}")
+        else:
+            print(f"Transcribing {idx}/{len(files_to_process)}: {filename}")
         
-        # Full path to the audio file
-        file_path = os.path.join(input_folder, filename)
+        # The audio file on disk, or the member of an archive
+        audio_input = audio_inputs[filename]
+        
+        # Extract information from the filename based on configured format
+        # For Fabla files: format is PARTICIPANT_ID_DATE_TIME.extension
+        # Example: P001_2024-01-15_14-30-00.wav
+        participant_id, date, time = extract_filename_info(audio_input.basename, filename_config)
+        audio_seconds = 0.0
         
         try:
-            # Transcribe the audio file using Whisper
-            result = model.transcribe(file_path)
+            # Decode the audio (or map it from the cache) and transcribe it
+            if audio_cache:
+                audio = audio_cache.load_audio(audio_input)
+            else:
+                audio = audio_input.load_audio()
+            audio_seconds = len(audio) / whisper.audio.SAMPLE_RATE
+            result = model.transcribe(audio, word_timestamps=word_timestamps)
+            used_model = model_name
+            
+            # Score the raw result; flagged files get a second pass with the bigger model
+            if score_quality:
+                metrics = quality_metrics(result)
+                reasons = flag_reasons(metrics, quality_thresholds)
+                if reasons and retranscribe_model:
+                    print(f"  Flagged ({', '.join(reasons)}); re-transcribing with {retranscribe_model}...")
+                    if retranscribe_whisper_model is None:
+                        retranscribe_whisper_model = whisper.load_model(retranscribe_model)
+                    result = retranscribe_whisper_model.transcribe(audio, word_timestamps=word_timestamps)
+                    used_model = retranscribe_model
+                    metrics = quality_metrics(result)
+                    reasons = flag_reasons(metrics, quality_thresholds)
+            
+            # Label each segment with a speaker before any output is written
+            if diarize:
+                if cache_mel and audio_cache:
+                    # The windows are cheap to derive from the cached spectrogram,
+                    # so they are recomputed on every run instead of cached too
+                    windows = window_embeddings(audio, audio_cache.load_log_mel(audio_input))
+                else:
+                    windows = embedding_cache.cached(audio_input, EMBEDDING_CACHE_KEY,
+                                                     lambda: window_embeddings(audio))
+                speaker_count = label_segments(result, windows)
+            
+            # Normalize and redact before any output is written
+            redacted = result
+            if postprocessor:
+                redacted = postprocessor.process_result(result, drop_raw=drop_raw)
             transcript = result["text"]
             
-            # Extract information from the filename based on configured format
-            # For Fabla files: format is PARTICIPANT_ID_DATE_TIME.extension
-            # Example: P001_2024-01-15_14-30-00.wav
-            participant_id, date, time = extract_filename_info(filename, filename_config)
+            # Write subtitle/JSON sidecars from the same pass
+            if output_formats:
+                sidecar_folder = output_folder
+                if basename_counts[audio_input.basename] > 1:
+                    sidecar_folder = output_folder / audio_input.folder
+                    sidecar_folder.mkdir(parents=True, exist_ok=True)
+                write_sidecar_files(result, audio_input.basename, sidecar_folder, output_formats, word_timestamps)
             
             # Append the results
-            results.append({
+            row = {
                 'Filename': filename,
                 'Participant ID': participant_id,
                 'Date': date,
-                'Time': time,
-                'Transcript': transcript
-            })
+                'Time': time
+            }
+            if keep_raw:
+                row['Transcript'] = transcript
+            if postprocessor and postprocessor.redacts:
+                row['Redacted Transcript'] = redacted['text']
+            if score_quality:
+                row.update(metrics)
+                row['Flagged'] = bool(reasons)
+                row['Flag Reasons'] = '; '.join(reasons)
+            if retranscribe_model or record_model:
+                row['Model'] = used_model
+            if diarize:
+                row['Speakers'] = speaker_count
+                if keep_raw:
+                    row['Speaker Transcript'] = speaker_transcript(result['segments'])
+                if postprocessor and postprocessor.redacts:
+                    row['Redacted Speaker Transcript'] = speaker_transcript(redacted['segments'])
+            results.append(row)
+            if on_row:
+                on_row(row)
+            if summary:
+                summary.add(participant_id, date, audio_seconds, transcript, filename=filename)
+            if manifest:
+                append_shard_row(output_folder, worker_id, row)
+                manifest.complete(filename, worker_id)
         except Exception as e:
             print(f"Error transcribing {filename}: {str(e)}")
+            if summary:
+                summary.add(participant_id, date, audio_seconds, failed=True, filename=filename)
+            if manifest:
+                manifest.fail(filename, worker_id)
             continue
     
+    if manifest:
+        manifest.close()
+    close_archives()
+    
+    if write_summary:
+        suffix = f".shard-{worker_id}" if manifest else ""
+        day_file, participant_file = summary.write(output_folder, suffix, include_files=bool(manifest))
+        print(f"Summary reports: {day_file}, {participant_file}")
+    
     return results
 
+def parse_arguments():
+    """Parse optional command-line settings."""
+    parser = argparse.ArgumentParser(description="Transcribe a folder of audio files with Whisper.")
+    parser.add_argument(
+        'input_folder',
+        nargs='?',
+        help="Folder, zip/tar archive or CSV/JSONL manifest of audio files "
+             "(a folder selection dialog is shown if omitted)"
+    )
+    parser.add_argument(
+        '--output-folder',
+        help="Where to write the outputs (default: <folder name>_transcripts in Downloads)"
+    )
+    parser.add_argument('--delimiter', help="Filename delimiter (default: '_')")
+    parser.add_argument('--id-position', type=int, help="Participant ID position in the filename (default: 0)")
+    parser.add_argument('--date-position', type=int, help="Date position in the filename (default: 1)")
+    parser.add_argument('--time-position', type=int, help="Time position in the filename (default: 2)")
+    parser.add_argument(
+        '--output-formats',
+        nargs='+',
+        choices=SIDECAR_FORMATS,
+        default=[],
+        help="Also write per-file sidecar outputs in these formats (e.g. --output-formats srt vtt json)"
+    )
+    parser.add_argument(
+        '--word-timestamps',
+        action='store_true',
+        help="Include word-level timestamps in the sidecar outputs"
+    )
+    parser.add_argument(
+        '--model',
+        default='base',
+        choices=whisper.available_models(),
+        help="Whisper model to use (default: base)"
+    )
+    parser.add_argument(
+        '--audio-cache',
+        metavar='DIR',
+        help="Cache decoded audio in this folder so repeated runs skip FFmpeg decoding"
+    )
+    parser.add_argument(
+        '--cache-mel',
+        action='store_true',
+        help="Also cache each file's log-mel spectrogram for speaker labelling (requires --audio-cache and --diarize)"
+    )
+    parser.add_argument(
+        '--summary-report',
+        action='store_true',
+        help="Write per-participant and per-day summaries (with missing days) next to transcripts.csv"
+    )
+    parser.add_argument(
+        '--shard-manifest',
+        metavar='PATH',
+        help="Shared SQLite manifest; run one worker per host with the same manifest to split the job"
+    )
+    parser.add_argument(
+        '--worker-id',
+        help="Name of this worker in the manifest and its shard file (default: hostname-pid)"
+    )
+    parser.add_argument(
+        '--lease-seconds',
+        type=int,
+        default=1800,
+        help="How long a claimed file is reserved before another worker may take it over (default: 1800)"
+    )
+    parser.add_argument(
+        '--local-workers',
+        type=int,
+        nargs='?',
+        const=0,
+        metavar='N',
+        help="Run N worker processes on this machine against one manifest, then merge their output "
+             "(without N, use the worker count from the host profile)"
+    )
+    parser.add_argument(
+        '--torch-threads',
+        type=int,
+        metavar='N',
+        help="CPU threads torch uses per process (default: from the host profile saved by autotune.py)"
+    )
+    parser.add_argument(
+        '--no-host-profile',
+        action='store_true',
+        help="Ignore the host profile and use torch's default thread count"
+    )
+    parser.add_argument(
+        '--merge-shards',
+        action='store_true',
+        help="Only merge the shard CSVs in the output folder into transcripts.csv"
+    )
+    parser.add_argument(
+        '--diarize',
+        action='store_true',
+        help="Label segments with speakers (for participant-interviewer recordings)"
+    )
+    parser.add_argument(
+        '--normalize-text',
+        action='store_true',
+        help="Normalize unicode, quotes and whitespace in the transcripts"
+    )
+    parser.add_argument(
+        '--redact',
+        nargs='+',
+        choices=sorted(REDACTORS),
+        default=[],
+        help="Redact these kinds of personal information into 'Redacted ...' columns"
+    )
+    parser.add_argument(
+        '--redact-names',
+        metavar='FILE',
+        help="Also redact the names listed in FILE (one per line)"
+    )
+    parser.add_argument(
+        '--drop-raw',
+        action='store_true',
+        help="Do not write unredacted text anywhere (requires --redact or --redact-names)"
+    )
+    parser.add_argument(
+        '--quality',
+        action='store_true',
+        help="Add quality metrics and a Flagged column for likely hallucinations"
+    )
+    parser.add_argument(
+        '--quality-thresholds',
+        nargs='+',
+        default=[],
+        metavar='NAME=VALUE',
+        help=f"Override flag thresholds (defaults: "
+             f"{', '.join(f'{name}={value}' for name, value in DEFAULT_THRESHOLDS.items())})"
+    )
+    parser.add_argument(
+        '--retranscribe-flagged',
+        metavar='MODEL',
+        choices=whisper.available_models(),
+        help="Transcribe flagged files again with this (bigger) model; implies --quality"
+    )
+    parser.add_argument(
+        '--progressive',
+        metavar='MODEL',
+        choices=whisper.available_models(),
+        help="Write a fast draft of every file first, then re-transcribe all files with MODEL "
+             "(most doubtful drafts first), updating transcripts.csv in place"
+    )
+    parser.add_argument(
+        '--draft-model',
+        default='tiny',
+        choices=whisper.available_models(),
+        help="Model for the draft pass of --progressive (default: tiny)"
+    )
+    args = parser.parse_args()
+    if args.input_folder and not (os.path.isdir(args.input_folder) or is_bulk_input(args.input_folder)):
+        if not os.path.exists(args.input_folder):
+            parser.error(f"input not found: {args.input_folder}")
+        parser.error(f"expected a folder, a zip/tar archive or a CSV/JSONL manifest: {args.input_folder}")
+    if args.progressive and (args.shard_manifest or args.local_workers is not None or args.retranscribe_flagged):
+        parser.error("--progressive cannot be combined with sharding or --retranscribe-flagged")
+    try:
+        args.quality_thresholds = parse_thresholds(args.quality_thresholds)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.drop_raw and not (args.redact or args.redact_names):
+        parser.error("--drop-raw requires --redact or --redact-names")
+    if args.cache_mel and not (args.audio_cache and args.diarize):
+        parser.error("--cache-mel requires --audio-cache and --diarize")
+    if args.torch_threads is not None and args.torch_threads < 1:
+        parser.error("--torch-threads must be at least 1")
+    return args
+
+def filename_config_from_args(args):
+    """Build the filename format configuration from command-line options."""
+    return {
+        'delimiter': args.delimiter or '_',
+        'id_position': 0 if args.id_position is None else args.id_position,
+        'date_position': 1 if args.date_position is None else args.date_position,
+        'time_position': 2 if args.time_position is None else args.time_position
+    }
+
+def merge_and_report(output_folder, shard_manifest=None):
+    """
+    Merge shard outputs into transcripts.csv and print a summary.
+    
+    The manifest (shard_manifest, or manifest.sqlite in output_folder) is
+    checked as well, so files that failed or were never finished are listed
+    instead of silently missing from transcripts.csv.
+    """
+    output_file, row_count = merge_shard_outputs(output_folder)
+    if output_file is None:
+        print(f"No shard files found in {output_folder}")
+        return
+    
+    print("\n" + "="*60)
+    print("Shards merged!")
+    print(f"Files transcribed: {row_count}")
+    print(f"Output file: {output_file}")
+    
+    manifest_path = Path(shard_manifest) if shard_manifest else output_folder / "manifest.sqlite"
+    if manifest_path.exists():
+        manifest = ShardManifest(manifest_path)
+        counts = manifest.counts()
+        unfinished = manifest.unfinished()
+        manifest.close()
+        print("Manifest: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+        if unfinished:
+            print(f"WARNING: {len(unfinished)} file(s) are not marked done in the manifest:")
+            for name, reason in unfinished[:MAX_LISTED_FILES]:
+                print(f"  {name}: {reason}")
+            if len(unfinished) > MAX_LISTED_FILES:
+                print(f"  ... and {len(unfinished) - MAX_LISTED_FILES} more")
+    else:
+        print(f"Manifest not found at {manifest_path}; use --shard-manifest to check for unfinished files.")
+    print("="*60)
+
+def run_progressive(input_folder, output_folder, filename_config, options, draft_model, final_model):
+    """
+    Transcribe everything with draft_model, write transcripts.csv, then
+    re-transcribe every file with final_model and update the rows in place.
+    """
+    summary_report = options.get('summary_report', False)
+    # Quality scores decide which drafts are refined first
+    options = {**options, 'score_quality': True, 'record_model': True, 'summary_report': False}
+    
+    # Each pass records into its own summary; the report is written once
+    # from the final state of every file (see write_progressive_summary)
+    draft_summary = StudySummary()
+    refine_summary = StudySummary()
+    
+    print(f"Draft pass with the {draft_model} model...")
+    results = transcribe_audio_files(input_folder, output_folder, filename_config,
+                                     **{**options, 'model_name': draft_model, 'summary': draft_summary})
+    if not results:
+        print("No files were transcribed.")
+        if summary_report:
+            write_progressive_summary(output_folder, draft_summary, refine_summary)
+        return
+    
+    output_file = output_folder / "transcripts.csv"
+    write_csv_atomic(results, output_file)
+    print("\n" + "="*60)
+    print(f"Draft complete: {len(results)} file(s) in {output_file}")
+    print(f"Now refining with the {final_model} model; rows are updated in place.")
+    print("="*60 + "\n")
+    
+    transcripts = ProgressiveTranscripts(results, output_file)
+    refined = transcribe_audio_files(
+        input_folder,
+        output_folder,
+        filename_config,
+        **{**options, 'model_name': final_model, 'only_files': refinement_order(results),
+           'on_row': transcripts.update, 'summary': refine_summary}
+    )
+    saved_file = transcripts.finish()
+    if summary_report:
+        write_progressive_summary(output_folder, draft_summary, refine_summary)
+    
+    print("\n" + "="*60)
+    print("Transcription complete!")
+    print(f"Files refined with {final_model}: {len(refined)} of {len(results)}")
+    print(f"Output file: {saved_file}")
+    print("="*60)
+
+def write_progressive_summary(output_folder, draft_summary, refine_summary):
+    """
+    Write the summary reports for a progressive run.
+
+    Each file is counted once: with its refined transcript if the refine
+    pass succeeded, otherwise as recorded by the draft pass (so files that
+    failed in the draft are still counted as failed).
+    """
+    refined = refine_summary.by_file()
+    refined = refined[~refined['Failed'].astype(bool)]
+    drafts = draft_summary.by_file()
+    summary = StudySummary()
+    summary.add_file_table(pd.concat([refined, drafts[~drafts['Filename'].isin(refined['Filename'])]],
+                                     ignore_index=True))
+    day_file, participant_file = summary.write(output_folder)
+    print(f"Summary reports: {day_file}, {participant_file}")
+
 def main():
     """Main function to orchestrate the transcription process."""
-    # Prompt user to select a folder
-    input_folder = select_folder()
+    args = parse_arguments()
+    
+    # Use the folder from the command line, or prompt the user to select one
+    input_folder = args.input_folder or select_folder()
     
     if not input_folder:
         print("No folder selected. Exiting.")
@@ -156,24 +646,114 @@ def main():
     
     print(f"Selected folder: {input_folder}")
     
-    # Get the original folder name
-    original_folder_name = os.path.basename(input_folder.rstrip('/\\'))
+    # Get the original folder (or archive/manifest) name
+    original_folder_name = input_display_name(input_folder)
     
-    # Create output folder in Downloads
-    downloads_folder = get_downloads_folder()
-    output_folder_name = f"{original_folder_name}_transcripts"
-    output_folder = downloads_folder / output_folder_name
+    # Create output folder in Downloads (unless one was given)
+    if args.output_folder:
+        output_folder = Path(args.output_folder)
+    else:
+        downloads_folder = get_downloads_folder()
+        output_folder_name = f"{original_folder_name}_transcripts"
+        output_folder = downloads_folder / output_folder_name
     
     # Create the output folder if it doesn't exist
     output_folder.mkdir(parents=True, exist_ok=True)
     
     print(f"Output folder: {output_folder}")
     
-    # Get filename format configuration from user
-    filename_config = get_filename_format_config()
+    if args.merge_shards:
+        merge_and_report(output_folder, args.shard_manifest)
+        return
+    
+    # Get filename format configuration from the command line, or from the
+    # user when running interactively
+    position_options = (args.delimiter, args.id_position, args.date_position, args.time_position)
+    if args.input_folder or any(option is not None for option in position_options):
+        filename_config = filename_config_from_args(args)
+    else:
+        filename_config = get_filename_format_config()
+    
+    options = {
+        'output_formats': args.output_formats,
+        'word_timestamps': args.word_timestamps,
+        'model_name': args.model,
+        'cache_dir': args.audio_cache,
+        'cache_mel': args.cache_mel,
+        'summary_report': args.summary_report,
+        'lease_seconds': args.lease_seconds,
+        'diarize': args.diarize,
+        'normalize_text': args.normalize_text,
+        'redact': args.redact,
+        'redact_names_file': args.redact_names,
+        'drop_raw': args.drop_raw,
+        'score_quality': args.quality,
+        'quality_thresholds': args.quality_thresholds,
+        'retranscribe_model': args.retranscribe_flagged
+    }
+    
+    # Thread and worker settings measured for this machine by autotune.py
+    profile = None if args.no_host_profile else load_host_profile()
+    if profile and not args.torch_threads:
+        check_profile_model(profile, args.progressive or args.model)
+    
+    if args.local_workers is not None:
+        local_workers = args.local_workers or (profile['workers'] if profile else 0)
+        if local_workers < 1:
+            print("No host profile found; run autotune.py first or give --local-workers a number.")
+            return
+        # Split the cores between the workers instead of each using all of them
+        worker_threads = args.torch_threads or threads_per_worker(local_workers, profile)
+        print(f"Starting {local_workers} local worker(s) with {worker_threads} torch thread(s) each")
+        
+        # Run N workers against one manifest, then merge their shards
+        manifest_path = args.shard_manifest or str(output_folder / "manifest.sqlite")
+        workers = [
+            multiprocessing.Process(
+                target=transcribe_audio_files,
+                args=(input_folder, output_folder, filename_config),
+                kwargs={**options, 'shard_manifest': manifest_path, 'worker_id': f"local-{n}",
+                        'torch_threads': worker_threads}
+            )
+            for n in range(1, local_workers + 1)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        merge_and_report(output_folder, manifest_path)
+        return
+    
+    torch_threads = args.torch_threads or (profile['torch_threads'] if profile else None)
+    if torch_threads:
+        set_torch_threads(torch_threads)
+        print(f"Using {torch_threads} torch thread(s)" + ("" if args.torch_threads else " from the host profile"))
+    
+    if args.progressive:
+        run_progressive(input_folder, output_folder, filename_config, options, args.draft_model, args.progressive)
+        return
+    
+    worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
     
     # Transcribe all audio files
-    results = transcribe_audio_files(input_folder, output_folder, filename_config)
+    results = transcribe_audio_files(
+        input_folder,
+        output_folder,
+        filename_config,
+        shard_manifest=args.shard_manifest,
+        worker_id=worker_id,
+        **options
+    )
+    
+    if args.shard_manifest:
+        # Each worker only writes its own shard; merging happens once all are done
+        print("\n" + "="*60)
+        print(f"Worker finished: {len(results)} file(s) transcribed")
+        if results:
+            print(f"Shard file: {shard_output_file(output_folder, worker_id)}")
+        print("Run again with --merge-shards once every worker has finished.")
+        print("="*60)
+        return
     
     if not results:
         print("No files were transcribed.")
@@ -191,6 +771,8 @@ def main():
     print(f"Transcription complete!")
     print(f"Files transcribed: {len(results)}")
     print(f"Output file: {output_file}")
+    if args.output_formats:
+        print(f"Sidecar files ({', '.join(args.output_formats)}): {output_folder}")
     print("="*60)
 
 if __name__ == "__main__":